@@ -0,0 +1,216 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Optional
+
+
+def hash_key(*parts: str) -> str:
+    """
+    Key ổn định (sha256) từ các phần text, dùng làm khoá cache.
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class SQLiteStore:
+    """
+    Lớp lưu trữ bền vững cho cache: một bảng key -> (value JSON, expires_at).
+    Dùng chung được giữa nhiều process (SQLite tự lock file).
+    """
+
+    def __init__(self, path, table: str = "cache"):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.table = table
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, tag TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({self.table})")}
+            if "tag" not in columns:
+                self._conn.execute(f"ALTER TABLE {self.table} ADD COLUMN tag TEXT")
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_tag ON {self.table} (tag)"
+            )
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at, tag FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        value, expires_at, tag = row
+        if expires_at < time.time():
+            self.delete(key)
+            return None
+        return json.loads(value), expires_at, tag
+
+    def set(self, key: str, value, expires_at: float, tag: Optional[str] = None):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, tag) VALUES (?, ?, ?, ?)",
+                (key, payload, expires_at, tag),
+            )
+
+    def delete(self, key: str):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def delete_tag(self, tag: str) -> int:
+        with self._lock, self._conn:
+            cur = self._conn.execute(f"DELETE FROM {self.table} WHERE tag = ?", (tag,))
+            return cur.rowcount
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+
+class LRUTTLCache:
+    """
+    Cache trong bộ nhớ có giới hạn kích thước (LRU) và thời gian sống (TTL).
+    store (tuỳ chọn): SQLiteStore làm tầng thứ hai, entry vẫn còn sau khi restart.
+    tag (tuỳ chọn, vd. user_id): để xoá cả nhóm entry bằng invalidate_tag.
+    encode / decode (tuỳ chọn): chuyển value <-> dạng JSON khi ghi / đọc store
+    (vd. np.ndarray trong bộ nhớ, list trong SQLite).
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600, store: Optional[SQLiteStore] = None,
+                 encode: Optional[Callable] = None, decode: Optional[Callable] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self.encode = encode
+        self.decode = decode
+        self._data = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.store_hits = 0
+
+    def _put(self, key: str, value, expires_at: float, tag: Optional[str] = None):
+        old = self._data.get(key)
+        if old is not None and old[2] != tag:
+            self._untag(key, old[2])
+        self._data[key] = (value, expires_at, tag)
+        self._data.move_to_end(key)
+        if tag is not None:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            evicted, (_, _, evicted_tag) = self._data.popitem(last=False)
+            self._untag(evicted, evicted_tag)
+
+    def _pop(self, key: str):
+        # Xoá entry khỏi bộ nhớ, kèm key trong index tag
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._untag(key, entry[2])
+        return entry
+
+    def _untag(self, key: str, tag: Optional[str]):
+        keys = self._tags.get(tag) if tag is not None else None
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tags[tag]
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at >= now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._pop(key)
+
+        if self.store is not None:
+            stored = self.store.get(key)
+            if stored is not None:
+                value, expires_at, tag = stored
+                if self.decode is not None:
+                    value = self.decode(value)
+                with self._lock:
+                    self._put(key, value, expires_at, tag)
+                    self.hits += 1
+                    self.store_hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value, tag: Optional[str] = None):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._put(key, value, expires_at, tag)
+        if self.store is not None:
+            self.store.set(key, self.encode(value) if self.encode is not None else value, expires_at, tag)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._pop(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def invalidate_tag(self, tag: str) -> int:
+        """
+        Xoá mọi entry gắn tag (vd. khi profile của user thay đổi).
+        """
+        with self._lock:
+            keys = self._tags.pop(tag, set())
+            removed = sum(1 for key in keys if self._data.pop(key, None) is not None)
+        if self.store is not None:
+            removed = max(removed, self.store.delete_tag(tag))
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+        if self.store is not None:
+            self.store.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "store_hits": self.store_hits,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "persistent": self.store is not None,
+            }
+
+
+def make_cache(backend: str, maxsize: int, ttl: float, db_path=None, table: str = "cache"):
+    """
+    Tạo cache theo backend cấu hình: "memory" (LRU trong process),
+    "sqlite" (LRU + SQLite tại db_path) hoặc "off" (trả về None).
+    """
+    if backend == "off":
+        return None
+    if backend == "memory":
+        return LRUTTLCache(maxsize=maxsize, ttl=ttl)
+    if backend == "sqlite":
+        return LRUTTLCache(maxsize=maxsize, ttl=ttl, store=SQLiteStore(db_path, table=table))
+    raise ValueError(f"Unknown cache backend: {backend}")
@@ -0,0 +1,153 @@
+import asyncio
+import random
+from typing import Optional
+
+import httpx
+
+from .config import (
+    NCP_API_KEY,
+    EMBEDDING_API_URL,
+    CLOVA_MAX_CONNECTIONS,
+    CLOVA_MAX_KEEPALIVE,
+    CLOVA_CONCURRENCY,
+    CLOVA_TIMEOUT,
+    CLOVA_MAX_RETRIES,
+    CLOVA_BACKOFF_BASE,
+    CLOVA_BACKOFF_MAX,
+)
+from .rate_limit import get_limiter
+
+# Chỉ retry khi bị rate limit hoặc lỗi phía server
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop = None
+_semaphores = {}
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    AsyncClient dùng chung (keep-alive + connection pool) cho mọi call CLOVA.
+    Gắn với event loop hiện tại; nếu loop đổi (vd. test) thì tạo client mới.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=CLOVA_MAX_CONNECTIONS,
+                max_keepalive_connections=CLOVA_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(CLOVA_TIMEOUT["chat"]),
+        )
+        _client_loop = loop
+        _semaphores.clear()
+    return _client
+
+
+async def aclose():
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+def _semaphore(endpoint: str) -> asyncio.Semaphore:
+    sem = _semaphores.get(endpoint)
+    if sem is None:
+        sem = asyncio.Semaphore(CLOVA_CONCURRENCY.get(endpoint, 4))
+        _semaphores[endpoint] = sem
+    return sem
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str]) -> float:
+    # Ưu tiên Retry-After của server, nếu không thì exponential backoff + full jitter
+    if retry_after:
+        try:
+            return min(float(retry_after), CLOVA_BACKOFF_MAX)
+        except ValueError:
+            pass
+    return random.uniform(0, min(CLOVA_BACKOFF_MAX, CLOVA_BACKOFF_BASE * (2 ** attempt)))
+
+
+async def post_json(endpoint: str, url: str, headers: dict, payload: dict,
+                    timeout: Optional[float] = None) -> dict:
+    """
+    POST JSON tới CLOVA Studio.
+    - endpoint: "embedding" | "reranker" | "chat" (giới hạn concurrency + timeout riêng)
+    - mỗi lần gửi (kể cả retry) đều lấy token từ rate limiter của endpoint
+    - retry với jittered backoff chỉ khi gặp 429/5xx, tối đa CLOVA_MAX_RETRIES lần
+    """
+    client = get_client()
+    limiter = get_limiter()
+    timeout = timeout if timeout is not None else CLOVA_TIMEOUT.get(endpoint, 60)
+
+    attempt = 0
+    while True:
+        await limiter.acquire(endpoint)
+        async with _semaphore(endpoint):
+            resp = await client.post(url, headers=headers, json=payload, timeout=timeout)
+
+        if resp.status_code in RETRY_STATUS and attempt < CLOVA_MAX_RETRIES:
+            await asyncio.sleep(_backoff_delay(attempt, resp.headers.get("Retry-After")))
+            attempt += 1
+            continue
+
+        resp.raise_for_status()
+        return resp.json()
+
+
+async def embed(text: str) -> list:
+    """
+    Gọi CLOVA Embedding v2 cho một đoạn text (API chỉ nhận 1 text / request).
+    """
+    headers = {
+        'Content-Type': 'application/json; charset=utf-8',
+        'Authorization': f'Bearer {str(NCP_API_KEY)}',
+        'X-NCP-CLOVASTUDIO-REQUEST-ID': '5bf30d7bddc94b9694304d0d88f0cef6'
+    }
+    resp = await post_json('embedding', EMBEDDING_API_URL, headers, {'text': text})
+    return resp['result']['embedding']
+
+
+async def stream_sse(endpoint: str, url: str, headers: dict, payload: dict,
+                     timeout: Optional[float] = None):
+    """
+    POST và đọc response dạng Server-Sent Events, yield từng (event, data) với data là text thô.
+    Retry 429/5xx chỉ áp dụng trước khi stream bắt đầu; giữ slot concurrency suốt stream.
+    """
+    client = get_client()
+    limiter = get_limiter()
+    timeout = timeout if timeout is not None else CLOVA_TIMEOUT.get(endpoint, 60)
+    headers = {**headers, "Accept": "text/event-stream"}
+
+    attempt = 0
+    while True:
+        await limiter.acquire(endpoint)
+        async with _semaphore(endpoint):
+            async with client.stream("POST", url, headers=headers, json=payload, timeout=timeout) as resp:
+                if resp.status_code in RETRY_STATUS and attempt < CLOVA_MAX_RETRIES:
+                    retry_after = resp.headers.get("Retry-After")
+                else:
+                    if resp.status_code >= 400:
+                        await resp.aread()
+                    resp.raise_for_status()
+
+                    event, data_lines = "message", []
+                    async for line in resp.aiter_lines():
+                        if not line:
+                            if data_lines:
+                                yield event, "\n".join(data_lines)
+                            event, data_lines = "message", []
+                        elif line.startswith(":"):
+                            continue
+                        elif line.startswith("event:"):
+                            event = line[len("event:"):].strip()
+                        elif line.startswith("data:"):
+                            data_lines.append(line[len("data:"):].lstrip())
+                    if data_lines:
+                        yield event, "\n".join(data_lines)
+                    return
+
+        await asyncio.sleep(_backoff_delay(attempt, retry_after))
+        attempt += 1
@@ -0,0 +1,162 @@
+import os
+import tempfile
+from pathlib import Path
+from dotenv import load_dotenv
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+load_dotenv(BASE_DIR.parent / '.env.local')
+
+NCP_API_KEY = os.getenv("NCP_API_KEY")
+
+EMBEDDING_API_URL = "https://clovastudio.stream.ntruss.com/v1/api-tools/embedding/v2"
+
+JOBS_DIR = BASE_DIR / "data" / "jobs"
+EMBEDDINGS_DIR = BASE_DIR / "data" / "roadmap_embeddings"
+
+
+def env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+# Cache embedding của query (LRU + TTL, tuỳ chọn lưu SQLite để sống qua restart)
+EMBEDDING_CACHE_SIZE = env_int("EMBEDDING_CACHE_SIZE", 4096)
+EMBEDDING_CACHE_TTL = env_float("EMBEDDING_CACHE_TTL", 7 * 24 * 3600)
+EMBEDDING_CACHE_DB = os.getenv("EMBEDDING_CACHE_DB") or None
+
+# HTTP client dùng chung cho CLOVA Studio (embedding / reranker / chat)
+CLOVA_MAX_CONNECTIONS = env_int("CLOVA_MAX_CONNECTIONS", 32)
+CLOVA_MAX_KEEPALIVE = env_int("CLOVA_MAX_KEEPALIVE", 16)
+CLOVA_CONCURRENCY = {
+    "embedding": env_int("CLOVA_CONCURRENCY_EMBEDDING", 8),
+    "reranker": env_int("CLOVA_CONCURRENCY_RERANKER", 4),
+    "chat": env_int("CLOVA_CONCURRENCY_CHAT", 4),
+}
+CLOVA_TIMEOUT = {
+    "embedding": env_float("CLOVA_TIMEOUT_EMBEDDING", 30),
+    "reranker": env_float("CLOVA_TIMEOUT_RERANKER", 60),
+    "chat": env_float("CLOVA_TIMEOUT_CHAT", 120),
+}
+CLOVA_MAX_RETRIES = env_int("CLOVA_MAX_RETRIES", 3)
+CLOVA_BACKOFF_BASE = env_float("CLOVA_BACKOFF_BASE", 0.5)
+CLOVA_BACKOFF_MAX = env_float("CLOVA_BACKOFF_MAX", 8)
+
+# Rate limit theo quota CLOVA (token bucket, số request / phút + burst)
+# Backend "sqlite" chia sẻ bucket giữa các worker qua một file; "memory" chỉ trong 1 process; "off" tắt.
+CLOVA_RATE_LIMIT_BACKEND = os.getenv("CLOVA_RATE_LIMIT_BACKEND", "sqlite")
+CLOVA_RATE_LIMIT_DB = os.getenv("CLOVA_RATE_LIMIT_DB") or str(
+    Path(tempfile.gettempdir()) / "clovax_rate_limit.sqlite"
+)
+CLOVA_RATE_LIMITS = {
+    "embedding": (env_float("CLOVA_RPM_EMBEDDING", 300), env_float("CLOVA_BURST_EMBEDDING", 5)),
+    "reranker": (env_float("CLOVA_RPM_RERANKER", 120), env_float("CLOVA_BURST_RERANKER", 2)),
+    "chat": (env_float("CLOVA_RPM_CHAT", 60), env_float("CLOVA_BURST_CHAT", 2)),
+}
+
+# Build embedding index cho roadmap (app.roadmap_build)
+# BUILD_INDEXES_ON_STARTUP=1: khi service khởi động, build index cho career nào còn thiếu
+BUILD_INDEXES_ON_STARTUP = os.getenv("BUILD_INDEXES_ON_STARTUP", "0") == "1"
+BUILD_PARALLEL_CAREERS = env_int("BUILD_PARALLEL_CAREERS", 2)
+
+# Cache kết quả /roadmap/personalized theo (profile fingerprint, roadmap version)
+PERSONALIZE_CACHE_BACKEND = os.getenv("PERSONALIZE_CACHE_BACKEND", "memory")  # memory | sqlite | off
+PERSONALIZE_CACHE_SIZE = env_int("PERSONALIZE_CACHE_SIZE", 1024)
+PERSONALIZE_CACHE_TTL = env_float("PERSONALIZE_CACHE_TTL", 30 * 24 * 3600)
+PERSONALIZE_CACHE_DB = os.getenv("PERSONALIZE_CACHE_DB") or str(
+    Path(tempfile.gettempdir()) / "clovax_personalize_cache.sqlite"
+)
+
+# Cá nhân hoá theo shard: chia roadmap theo stage (hoặc theo số item tối đa / shard),
+# mỗi shard một call HCX-007 chạy song song
+PERSONALIZE_SHARDED = os.getenv("PERSONALIZE_SHARDED", "0") == "1"
+PERSONALIZE_SHARD_MAX_ITEMS = env_int("PERSONALIZE_SHARD_MAX_ITEMS", 0)  # 0 = mỗi stage một shard
+PERSONALIZE_SHARD_CONCURRENCY = env_int("PERSONALIZE_SHARD_CONCURRENCY", 4)
+
+# Giao thức prompt cho HCX-007:
+# - "compact": gửi bảng item rút gọn (id | name | skill_tags | estimated_hours),
+#   model chỉ trả về {item_id: {check, personalization}}
+# - "full": gửi nguyên roadmap JSON, model trả lại toàn bộ roadmap
+PERSONALIZE_PROTOCOL = os.getenv("PERSONALIZE_PROTOCOL", "compact")
+
+# Retrieval-pruned: dùng embedding profile + index roadmap để chỉ gửi top-N item
+# cho HCX-007, các item còn lại lấy giá trị mặc định suy ra từ điểm kỹ năng / môn học
+PERSONALIZE_PRUNED = os.getenv("PERSONALIZE_PRUNED", "0") == "1"
+PERSONALIZE_PRUNE_TOP_N = env_int("PERSONALIZE_PRUNE_TOP_N", 20)
+
+# Rule engine (app/personalize_rules.py): quyết định trước item already_mastered / high_priority
+# hiển nhiên, chỉ gửi item mơ hồ cho model. Chat API lỗi hoặc chậm hơn
+# PERSONALIZE_FALLBACK_TIMEOUT giây (0 = không giới hạn) -> trả kết quả chỉ bằng rule.
+PERSONALIZE_RULES = os.getenv("PERSONALIZE_RULES", "1") == "1"
+PERSONALIZE_FALLBACK_TIMEOUT = env_float("PERSONALIZE_FALLBACK_TIMEOUT", 0)
+
+# Cá nhân hoá hàng loạt (app.personalize_batch): số cặp (user, job) chạy song song
+# và thư mục chứa checkpoint <job_id>.jsonl để chạy tiếp khi bị lỗi
+PERSONALIZE_BATCH_CONCURRENCY = env_int("PERSONALIZE_BATCH_CONCURRENCY", 4)
+PERSONALIZE_BATCH_DIR = Path(os.getenv("PERSONALIZE_BATCH_DIR") or Path(tempfile.gettempdir()) / "clovax_batches")
+
+# MongoDB (app/mongo.py): URI lấy từ env / .env.local, không để trong code.
+# Chưa cấu hình MONGO_URI -> chỉ dùng data/users/users.json.
+MONGO_URI = os.getenv("MONGO_URI")
+MONGO_DB = os.getenv("MONGO_DB", "career-advisor")
+MONGO_MAX_POOL_SIZE = env_int("MONGO_MAX_POOL_SIZE", 10)
+MONGO_MIN_POOL_SIZE = env_int("MONGO_MIN_POOL_SIZE", 0)
+MONGO_TIMEOUT_MS = env_int("MONGO_TIMEOUT_MS", 5000)
+
+# Cache profile (user + student) trong process, TTL ngắn để profile mới cập nhật sớm có hiệu lực
+PROFILE_CACHE_SIZE = env_int("PROFILE_CACHE_SIZE", 4096)
+PROFILE_CACHE_TTL = env_float("PROFILE_CACHE_TTL", 60)
+
+# Retrieval của /search/: "dense" (cosine) | "lexical" (BM25, không gọi API) | "hybrid" (RRF)
+SEARCH_MODE = os.getenv("SEARCH_MODE", "hybrid")
+SEARCH_RRF_K = env_int("SEARCH_RRF_K", 60)
+
+# Reranker của /search_rerank/: "clova" (remote) | "local" (CPU, không gọi API) | "auto"
+# auto (opt-in): dùng local khi gap điểm retrieval giữa RERANK_SKIP_TOP hạng đầu >= RERANK_SKIP_GAP
+# (gap tương đối: (s1 - s2) / s1), còn lại gọi CLOVA (lỗi thì fallback local).
+# Reranker local không sinh "answer" (trả ""), nên mặc định vẫn là "clova".
+RERANKER = os.getenv("RERANKER", "clova")
+RERANK_SKIP_GAP = env_float("RERANK_SKIP_GAP", 0.1)
+RERANK_SKIP_TOP = env_int("RERANK_SKIP_TOP", 1)
+
+# Vector index cho search dense (app/vector_index.py): "exact" (brute force) | "ivf" (ANN).
+# IVF chỉ dùng cho index có >= VECTOR_INDEX_MIN_DOCS doc (index nhỏ quét toàn bộ vẫn nhanh hơn),
+# được lưu ra <name>.ivf.npz cạnh artifact embedding.
+# IVF_NLIST: số cụm (0 = ~sqrt(n_docs)); IVF_NPROBE: số cụm được quét mỗi query (tăng = recall cao hơn, chậm hơn).
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "exact")
+VECTOR_INDEX_MIN_DOCS = env_int("VECTOR_INDEX_MIN_DOCS", 1000)
+IVF_NLIST = env_int("IVF_NLIST", 0)
+IVF_NPROBE = env_int("IVF_NPROBE", 8)
+
+# Embedding profile user (app/profile_embeddings.py): tính trước cho mọi user, chỉ tính lại khi
+# profile đổi (meta.updated_at / hash text profile). Backend "sqlite" để CLI
+# (python -m app.profile_embeddings) và các worker dùng chung; "memory" chỉ trong process.
+PROFILE_EMBEDDING_BACKEND = os.getenv("PROFILE_EMBEDDING_BACKEND", "sqlite")  # memory | sqlite
+PROFILE_EMBEDDING_DB = os.getenv("PROFILE_EMBEDDING_DB") or str(
+    Path(tempfile.gettempdir()) / "clovax_profile_embeddings.sqlite"
+)
+# PROFILE_EMBEDDINGS_ON_STARTUP=1: khi service khởi động, tính embedding cho user trong users.json
+# còn thiếu / đã cũ (chạy nền). Mặc định tắt: mỗi worker sẽ tự tính cho cả cohort, nên tính
+# trước một lần bằng python -m app.profile_embeddings (chỉ bật khi chạy một worker).
+PROFILE_EMBEDDINGS_ON_STARTUP = os.getenv("PROFILE_EMBEDDINGS_ON_STARTUP", "0") == "1"
+
+# Query embedding của /search/ khi có câu hỏi:
+# "full" = embed cả hồ sơ + câu hỏi; "combined" = vector profile đã lưu + embedding chỉ của câu hỏi
+# (trộn theo SEARCH_QUESTION_WEIGHT), câu hỏi giống nhau dùng chung cache giữa các user
+SEARCH_QUERY_EMBEDDING = os.getenv("SEARCH_QUERY_EMBEDDING", "full")
+SEARCH_QUESTION_WEIGHT = env_float("SEARCH_QUESTION_WEIGHT", 0.5)
+
+# Đọc lại data/users/users.json mỗi USERS_RELOAD_INTERVAL giây nếu file đã đổi (0 = tắt,
+# vẫn reload được bằng POST /users/reload)
+USERS_RELOAD_INTERVAL = env_float("USERS_RELOAD_INTERVAL", 0)
+
+# Skill gap (app/skill_gap.py) làm feature:
+# - SEARCH_SKILL_GAP_WEIGHT > 0: /search/ xếp hạng lại theo (1 - w) * điểm retrieval + w * priority của item
+# - PERSONALIZE_SKILL_GAP=1: thêm bảng gap / readiness của các item vào prompt cá nhân hoá
+SEARCH_SKILL_GAP_WEIGHT = env_float("SEARCH_SKILL_GAP_WEIGHT", 0)
+PERSONALIZE_SKILL_GAP = os.getenv("PERSONALIZE_SKILL_GAP", "0") == "1"
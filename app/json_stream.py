@@ -0,0 +1,89 @@
+import json
+
+
+class ItemStreamParser:
+    """
+    Parse JSON tăng dần khi model stream từng đoạn text.
+    Mỗi khi một object có key "personalization" đóng ngoặc xong, feed() trả về
+    (item_id, object) cho object đó. item_id lấy từ field "id" của object, hoặc
+    từ key đứng trước object (dạng {"<item_id>": {...}}).
+    """
+
+    def __init__(self, normalize=None):
+        # normalize: hàm làm sạch chuỗi JSON trước khi parse (vd. bỏ trailing comma)
+        self.normalize = normalize
+        self.buffer = ""
+        self._pos = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._after_colon = False
+        self._stack = []  # (vị trí '{', key đứng trước) cho từng object đang mở
+        self._seen = set()
+
+    def feed(self, chunk: str) -> list:
+        self.buffer += chunk
+        items = []
+        buf = self.buffer
+
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start:i + 1]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+                self._after_colon = False
+            elif ch == ":":
+                self._after_colon = self._last_string is not None
+            elif ch == "{":
+                key = self._last_string if self._after_colon else None
+                self._stack.append((i, key))
+                self._last_string = None
+                self._after_colon = False
+            elif ch == "}":
+                if self._stack:
+                    start, key = self._stack.pop()
+                    item = self._try_item(buf[start:i + 1], key)
+                    if item is not None:
+                        items.append(item)
+                self._last_string = None
+                self._after_colon = False
+            elif ch in ",[]":
+                self._last_string = None
+                self._after_colon = False
+
+        self._pos = len(buf)
+        return items
+
+    def _try_item(self, candidate: str, key):
+        if '"personalization"' not in candidate:
+            return None
+        try:
+            text = self.normalize(candidate) if self.normalize else candidate
+            obj = json.loads(text)
+        except Exception:
+            return None
+        if not isinstance(obj, dict) or "personalization" not in obj:
+            return None
+
+        item_id = obj.get("id")
+        if not item_id and key is not None:
+            try:
+                item_id = json.loads(key)
+            except Exception:
+                item_id = None
+        if not item_id or item_id in self._seen:
+            return None
+        self._seen.add(item_id)
+        return item_id, obj
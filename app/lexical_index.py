@@ -0,0 +1,89 @@
+"""
+Index lexical BM25 cho text của roadmap (chạy song song với ma trận embedding của RoadmapIndex)
+và reciprocal-rank fusion (RRF) để gộp thứ hạng lexical + cosine.
+Toàn bộ bằng NumPy, không gọi API -> dùng được khi CLOVA không khả dụng.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text) -> list:
+    return _TOKEN_RE.findall(str(text).lower())
+
+
+class BM25Index:
+    """
+    BM25 (Okapi) dạng sparse: với mỗi term lưu sẵn mảng doc index + trọng số BM25
+    (idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl))).
+    Chấm điểm một query = cộng vector hoá trọng số của các term trong query.
+    """
+
+    def __init__(self, texts, k1: float = 1.5, b: float = 0.75):
+        self.n_docs = len(texts)
+        self.k1 = k1
+        self.b = b
+
+        docs_tf = [Counter(tokenize(t)) for t in texts]
+        lengths = np.array([sum(tf.values()) for tf in docs_tf], dtype=np.float32)
+        avgdl = float(lengths.mean()) if self.n_docs and lengths.mean() > 0 else 1.0
+
+        postings = {}
+        for doc_idx, tf in enumerate(docs_tf):
+            for term, count in tf.items():
+                postings.setdefault(term, ([], []))
+                postings[term][0].append(doc_idx)
+                postings[term][1].append(count)
+
+        self.postings = {}
+        for term, (doc_idx, counts) in postings.items():
+            doc_idx = np.asarray(doc_idx, dtype=np.int64)
+            tf = np.asarray(counts, dtype=np.float32)
+            df = len(doc_idx)
+            idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5))
+            norm = k1 * (1.0 - b + b * lengths[doc_idx] / avgdl)
+            self.postings[term] = (doc_idx, (idf * tf * (k1 + 1.0) / (tf + norm)).astype(np.float32))
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def scores(self, query: str) -> np.ndarray:
+        """
+        Điểm BM25 của query cho mọi doc (doc không chứa term nào = 0).
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term, qtf in Counter(tokenize(query)).items():
+            posting = self.postings.get(term)
+            if posting is not None:
+                # Mỗi doc xuất hiện tối đa một lần trong posting -> cộng trực tiếp được
+                scores[posting[0]] += qtf * posting[1]
+        return scores
+
+
+def ranks(scores: np.ndarray) -> np.ndarray:
+    """
+    Thứ hạng (0 = cao nhất) của từng phần tử theo điểm giảm dần.
+    """
+    order = np.argsort(-scores, kind="stable")
+    result = np.empty(len(scores), dtype=np.int64)
+    result[order] = np.arange(len(scores))
+    return result
+
+
+def rrf_fuse(score_lists, k: int = 60, ignore_zero=None) -> np.ndarray:
+    """
+    Reciprocal-rank fusion: sum_i 1 / (k + rank_i + 1).
+    - score_lists: các mảng điểm cùng độ dài (vd. cosine, BM25) trên cùng tập doc.
+    - ignore_zero: index của các mảng mà doc điểm 0 không được cộng (vd. BM25 không khớp term nào).
+    """
+    ignore_zero = set(ignore_zero or ())
+    fused = np.zeros(len(score_lists[0]), dtype=np.float32)
+    for i, scores in enumerate(score_lists):
+        contrib = 1.0 / (k + ranks(scores) + 1.0)
+        if i in ignore_zero:
+            contrib = np.where(scores > 0, contrib, 0.0)
+        fused += contrib.astype(np.float32)
+    return fused
@@ -0,0 +1,86 @@
+"""
+Kết nối MongoDB dùng chung cho các service.
+
+- Client được tạo lazily ở lần dùng đầu tiên (import module không mở kết nối),
+  URI / tên DB / kích thước pool lấy từ config (MONGO_URI, MONGO_DB, MONGO_MAX_POOL_SIZE).
+- pymongo là driver đồng bộ: mọi truy vấn được chạy qua run() trên thread pool riêng
+  (cùng kích thước với connection pool) để không block event loop.
+- MONGO_URI=mongomock://... dùng mongomock (in-memory, cần `pip install mongomock`) để test.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .config import MONGO_DB, MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_TIMEOUT_MS, MONGO_URI
+
+_client = None
+_lock = threading.Lock()
+_executor = None
+
+
+def is_configured() -> bool:
+    return bool(MONGO_URI) or _client is not None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                if not MONGO_URI:
+                    raise RuntimeError("MONGO_URI is not set in environment variables.")
+                if MONGO_URI.startswith("mongomock://"):
+                    import mongomock
+
+                    _client = mongomock.MongoClient()
+                else:
+                    from pymongo import MongoClient
+
+                    _client = MongoClient(
+                        MONGO_URI,
+                        maxPoolSize=MONGO_MAX_POOL_SIZE,
+                        minPoolSize=MONGO_MIN_POOL_SIZE,
+                        serverSelectionTimeoutMS=MONGO_TIMEOUT_MS,
+                    )
+    return _client
+
+
+def set_client(client):
+    """
+    Dùng client có sẵn (vd. mongomock.MongoClient() trong test) thay vì tạo từ MONGO_URI.
+    """
+    global _client
+    _client = client
+
+
+def get_db():
+    return get_client()[MONGO_DB]
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=max(1, MONGO_MAX_POOL_SIZE),
+                                               thread_name_prefix="mongo")
+    return _executor
+
+
+async def run(fn, *args, **kwargs):
+    """
+    Chạy một hàm pymongo (blocking) trên thread pool của Mongo.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(fn, *args, **kwargs))
+
+
+def close():
+    global _client, _executor
+    if _client is not None:
+        _client.close()
+        _client = None
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
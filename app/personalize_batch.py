@@ -0,0 +1,193 @@
+"""
+Chạy cá nhân hoá roadmap hàng loạt (user_ids x jobnames) để điền sẵn PERSONALIZE_CACHE,
+ví dụ cho cả khoá trước đầu kỳ. Request tương tác sau đó chỉ đọc kết quả từ cache.
+
+Dùng qua API (POST /roadmap/personalized/batch) hoặc CLI:
+
+    python -m app.personalize_batch                          # mọi user x machine learning
+    python -m app.personalize_batch --users STU001 STU002 --jobs "data scientist" "data analyst"
+    python -m app.personalize_batch --job-id intake_2025     # chạy lại -> tiếp tục từ checkpoint
+
+Kết quả chỉ có ích khi được lưu bền vững (checkpoint đánh dấu cặp đã xong, chạy lại sẽ bỏ qua):
+cần PERSONALIZE_CACHE_BACKEND=sqlite, API và CLI từ chối chạy với cache chỉ trong bộ nhớ.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from .config import PERSONALIZE_BATCH_CONCURRENCY, PERSONALIZE_BATCH_DIR
+
+Pair = Tuple[str, str]
+
+
+def new_job_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def checkpoint_path(job_id: str, batch_dir: Path = PERSONALIZE_BATCH_DIR) -> Path:
+    return Path(batch_dir) / f"{job_id}.jsonl"
+
+
+def load_checkpoint(path: Path) -> set:
+    """
+    Các cặp (user_id, jobname) đã xong trong lần chạy trước.
+    Checkpoint dạng JSONL: mỗi dòng {"user_id", "jobname", "source"}; dòng ghi dở thì bỏ qua.
+    """
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            done.add((rec["user_id"], rec["jobname"]))
+    return done
+
+
+def new_state(job_id: str, pairs: List[Pair]) -> dict:
+    return {
+        "job_id": job_id,
+        "total": len(pairs),
+        "done": 0,
+        "skipped": 0,
+        "failed": 0,
+        "sources": {},
+        "errors": [],
+        "running": True,
+        "seconds": 0.0,
+    }
+
+
+async def run_batch(pairs: List[Pair], personalize: Callable[[str, str], Awaitable[str]],
+                    concurrency: int = PERSONALIZE_BATCH_CONCURRENCY, job_id: Optional[str] = None,
+                    batch_dir: Path = PERSONALIZE_BATCH_DIR, state: Optional[dict] = None,
+                    progress: bool = False) -> dict:
+    """
+    Chạy personalize(user_id, jobname) cho từng cặp với tối đa `concurrency` cặp cùng lúc.
+    Mọi call HCX-007 vẫn đi qua clova_client nên chung rate limiter với traffic tương tác.
+    - personalize trả về nguồn kết quả ("model" / "cache" ...) sau khi kết quả đầy đủ đã được
+      lưu, raise nếu thất bại (lỗi, kết quả thiếu item hoặc không lưu được).
+    - Cặp thành công được append vào checkpoint <batch_dir>/<job_id>.jsonl; chạy lại cùng
+      job_id sẽ bỏ qua các cặp đó (cặp lỗi được chạy lại).
+    - state: dict tiến độ (xem new_state), cập nhật trong lúc chạy để API đọc.
+    """
+    job_id = job_id or new_job_id()
+    batch_dir = Path(batch_dir)
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    path = checkpoint_path(job_id, batch_dir)
+
+    state = state if state is not None else new_state(job_id, pairs)
+    done = load_checkpoint(path)
+    queue = asyncio.Queue()
+    for pair in pairs:
+        if pair in done:
+            state["skipped"] += 1
+        else:
+            queue.put_nowait(pair)
+
+    bar = None
+    if progress:
+        from tqdm import tqdm
+
+        bar = tqdm(total=len(pairs), initial=state["skipped"], desc=f"Personalizing ({job_id})", unit="pairs")
+
+    started = time.perf_counter()
+    try:
+        with open(path, "a", encoding="utf-8") as ckpt:
+
+            async def worker():
+                while True:
+                    try:
+                        user_id, jobname = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        source = await personalize(user_id, jobname)
+                    except Exception as e:
+                        state["failed"] += 1
+                        state["errors"].append({"user_id": user_id, "jobname": jobname, "error": str(e)})
+                    else:
+                        state["done"] += 1
+                        state["sources"][source] = state["sources"].get(source, 0) + 1
+                        rec = {"user_id": user_id, "jobname": jobname, "source": source}
+                        ckpt.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                        ckpt.flush()
+                    state["seconds"] = time.perf_counter() - started
+                    if bar is not None:
+                        bar.update(1)
+
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(max(1, concurrency)):
+                    tg.create_task(worker())
+    finally:
+        state["running"] = False
+        state["seconds"] = time.perf_counter() - started
+        if bar is not None:
+            bar.close()
+    return state
+
+
+def format_state(state: dict) -> str:
+    return (
+        f"{state['job_id']}: {state['total']} pairs, done {state['done']}, "
+        f"skipped {state['skipped']}, failed {state['failed']} in {state['seconds']:.1f}s "
+        f"(sources: {state['sources']})"
+    )
+
+
+async def _main(args):
+    from . import clova_client, mongo
+    from . import personalize_api
+
+    try:
+        user_ids = args.users or await personalize_api.all_user_ids()
+        pairs = [(u, j) for u in user_ids for j in args.jobs]
+        state = await run_batch(
+            pairs,
+            personalize_api.batch_personalize_fn(refresh=args.refresh),
+            concurrency=args.concurrency,
+            job_id=args.job_id,
+            batch_dir=args.batch_dir,
+            progress=True,
+        )
+    finally:
+        await clova_client.aclose()
+        mongo.close()
+    print(format_state(state))
+    for err in state["errors"]:
+        print(f"  {err['user_id']} x {err['jobname']}: {err['error']}")
+
+
+def main(argv=None):
+    from .personalize_api import JOB_NAME
+
+    parser = argparse.ArgumentParser(description="Cá nhân hoá roadmap hàng loạt, ghi kết quả vào cache")
+    parser.add_argument("--users", nargs="+", default=None,
+                        help="user_id cần chạy (mặc định: mọi user trong users.json + MongoDB)")
+    parser.add_argument("--jobs", nargs="+", default=[JOB_NAME], help="jobname (roadmap trong data/jobs)")
+    parser.add_argument("--concurrency", type=int, default=PERSONALIZE_BATCH_CONCURRENCY,
+                        help="Số cặp (user, job) chạy song song")
+    parser.add_argument("--job-id", default=None,
+                        help="Id của batch; chạy lại cùng id để tiếp tục từ checkpoint")
+    parser.add_argument("--batch-dir", type=Path, default=PERSONALIZE_BATCH_DIR)
+    parser.add_argument("--refresh", action="store_true", help="Bỏ qua kết quả đã có trong cache")
+    args = parser.parse_args(argv)
+    args.job_id = args.job_id or new_job_id()
+
+    from .personalize_api import batch_cache_error
+
+    error = batch_cache_error()
+    if error:
+        parser.error(error)
+
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
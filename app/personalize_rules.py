@@ -0,0 +1,270 @@
+"""
+Đánh giá item roadmap không cần model: suy ra mức độ thành thạo của sinh viên
+với từng item từ skills_technical / skills_general / it_skills / course_scores.
+
+- resolve_items: quyết định ngay các item "hiển nhiên" (already_mastered / high_priority),
+  chỉ để lại item còn mơ hồ cho HCX-007.
+- rule_based_items: kết quả đầy đủ chỉ bằng rule (fallback khi chat API chậm / lỗi).
+"""
+from typing import Optional
+
+# Tăng khi đổi rule / mapping để cache kết quả cũ hết hiệu lực
+RULES_VERSION = "2"
+
+# Thứ tự priority mặc định theo status (0 = ưu tiên cao nhất)
+STATUS_PRIORITY = {
+    "high_priority": 0,
+    "medium_priority": 1,
+    "low_priority": 2,
+    "optional": 3,
+    "already_mastered": 4,
+}
+
+# Chỉ có label trong it_skills (không có điểm) -> coi như mức trung bình
+LABEL_LEVEL = 6.0
+
+# Ngưỡng (thang 10) để rule tự quyết định, ngoài khoảng này item được gửi cho model
+MASTERED_LEVEL = 8.0
+WEAK_LEVEL = 4.0
+# Stage khuyến nghị học trước kỳ hiện tại ít nhất chừng này kỳ -> coi như đã học xong
+PAST_STAGE_SEMESTERS = 4
+
+# skill_tag trong data/jobs -> các key trong profile là bằng chứng cho tag đó:
+# tên skill trong skills_technical / skills_general / it_skills hoặc mã môn trong course_scores.
+# Tag không có trong bảng thì khớp theo tên (xem tag_level).
+SKILL_TAG_SOURCES = {
+    "Python": ("python",),
+    "Python Advanced": ("python",),
+    "Programming Fundamentals": ("programming", "python", "ptit-cpp", "CS102"),
+    "OOP Basics": ("oop", "java", "ptit-cpp"),
+    "Java": ("java",),
+    "JavaScript": ("javascript",),
+    "Node.js": ("javascript",),
+    "HTML": ("html",),
+    "CSS": ("css",),
+    "Frontend Development": ("html", "css", "javascript"),
+    "Backend Development": ("java", "spring", "python", "database"),
+    "SQL": ("sql", "database", "CS203"),
+    "Databases": ("database", "sql", "CS203"),
+    "Data Modeling": ("database", "CS203"),
+    "Linux": ("linux",),
+    "Operating Systems": ("linux",),
+    "Docker": ("docker",),
+    "Linear Algebra": ("MATH201",),
+    "Calculus": ("MATH101", "MATH102"),
+    "Probability & Statistics": ("ptit-probability-statistics",),
+    "Probability and Statistics": ("ptit-probability-statistics",),
+    "Statistics": ("ptit-probability-statistics",),
+    "Computer Networks": ("CS202",),
+    "Data Analysis": ("data_analysis",),
+    "Data Exploration Basic": ("data_analysis",),
+    "Machine Learning": ("machine_learning",),
+    "ML Basics": ("machine_learning",),
+    "System Design": ("system_design",),
+}
+
+
+def normalize_skill(name) -> str:
+    return " ".join(str(name).lower().replace("_", " ").replace("-", " ").split())
+
+
+def partial_skill_match(key: str, tag: str) -> bool:
+    """
+    Khớp một phần theo từ (đã normalize): mọi từ của tên này đều có trong tên kia,
+    vd. "python" ~ "python programming", nhưng "java" !~ "javascript", "sql" !~ "nosql".
+    """
+    key_tokens, tag_tokens = set(key.split()), set(tag.split())
+    return bool(key_tokens) and bool(tag_tokens) and (key_tokens <= tag_tokens or tag_tokens <= key_tokens)
+
+
+def profile_skill_levels(profile: dict) -> dict:
+    """
+    Gom mức độ (thang 10) của profile theo tên skill đã normalize:
+    skills_technical / skills_general (1-10), điểm môn học (thang 10, theo tên và mã môn),
+    label trong it_skills (LABEL_LEVEL nếu chưa có điểm).
+    """
+    levels = {}
+
+    def put(name, value):
+        key = normalize_skill(name)
+        if not key:
+            return
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return
+        levels[key] = max(levels.get(key, value), value)
+
+    for field in ("skills_technical", "skills_general"):
+        for name, value in (profile.get(field) or {}).items():
+            put(name, value)
+    for c in profile.get("course_scores") or []:
+        for name in (c.get("name"), c.get("code")):
+            if name:
+                put(name, c.get("grade"))
+    for label in profile.get("it_skills") or []:
+        levels.setdefault(normalize_skill(label), LABEL_LEVEL)
+    return levels
+
+
+# Bảng mapping đã normalize, tính một lần khi import
+TAG_SOURCES = {
+    normalize_skill(tag): tuple(normalize_skill(s) for s in sources)
+    for tag, sources in SKILL_TAG_SOURCES.items()
+}
+
+
+def tag_level(tag: str, levels: dict) -> Optional[float]:
+    """
+    Mức độ của profile với một skill_tag: theo SKILL_TAG_SOURCES (lấy nguồn cao nhất),
+    nếu không có thì khớp đúng tên, rồi khớp một phần (vd. "Python" ~ "python programming").
+    None nếu không có bằng chứng.
+    """
+    key = normalize_skill(tag)
+    mapped = [levels[s] for s in TAG_SOURCES.get(key, ()) if s in levels]
+    if mapped:
+        return max(mapped)
+    if key in levels:
+        return levels[key]
+    matched = [v for k, v in levels.items() if len(k) >= 3 and partial_skill_match(k, key)]
+    return max(matched) if matched else None
+
+
+def item_skill_level(item: dict, levels: dict) -> Optional[float]:
+    """
+    Trung bình mức độ của các skill_tag có bằng chứng trong profile (None nếu không tag nào khớp).
+    """
+    found = [lv for lv in (tag_level(t, levels) for t in item.get("skill_tags", []) or []) if lv is not None]
+    return sum(found) / len(found) if found else None
+
+
+def _status_for_level(level: Optional[float]) -> str:
+    if level is None:
+        return "low_priority"
+    if level >= 8:
+        return "already_mastered"
+    if level >= 6:
+        return "low_priority"
+    if level >= 4:
+        return "medium_priority"
+    return "high_priority"
+
+
+def default_item_personalization(item: dict, levels: dict) -> dict:
+    """
+    check + personalization mặc định (deterministic) cho 1 item,
+    dùng cho các item không được gửi cho model.
+    """
+    level = item_skill_level(item, levels)
+    status = _status_for_level(level)
+    name = item.get("name", "")
+
+    if level is None:
+        description = f"{name}: chưa có dữ liệu trong hồ sơ về các kỹ năng liên quan, có thể học sau các mục trọng tâm."
+        reason = "Hồ sơ không có điểm kỹ năng hoặc môn học khớp với skill_tags của mục này."
+    else:
+        description = f"{name}: mức độ hiện tại của bạn với các kỹ năng liên quan khoảng {level:.1f}/10."
+        reason = f"Suy ra từ điểm kỹ năng / môn học liên quan trong hồ sơ ({level:.1f}/10)."
+
+    return {
+        "check": status == "already_mastered",
+        "personalization": {
+            "status": status,
+            "priority": STATUS_PRIORITY[status],
+            "personalized_description": description,
+            "reason": reason,
+        },
+    }
+
+
+def _semesters(stage: dict) -> list:
+    semesters = []
+    for s in stage.get("recommended_semesters", []) or []:
+        try:
+            semesters.append(int(s))
+        except (TypeError, ValueError):
+            continue
+    return semesters
+
+
+def resolve_item(item: dict, stage: dict, levels: dict, current_semester) -> Optional[dict]:
+    """
+    Quyết định chắc chắn cho 1 item nếu có, None nếu item còn mơ hồ (cần model):
+    - already_mastered: skill liên quan đạt MASTERED_LEVEL, hoặc stage khuyến nghị
+      học trước kỳ hiện tại >= PAST_STAGE_SEMESTERS kỳ và profile không cho thấy yếu.
+    - high_priority: skill liên quan dưới WEAK_LEVEL trong khi stage đã đến kỳ cần học.
+    """
+    level = item_skill_level(item, levels)
+    semesters = _semesters(stage)
+    try:
+        semester = int(current_semester)
+    except (TypeError, ValueError):
+        semester = None
+    name = item.get("name", "")
+
+    if level is not None and level >= MASTERED_LEVEL:
+        status = "already_mastered"
+        description = f"Bạn đã nắm vững các kỹ năng của {name}, có thể ôn nhanh hoặc bỏ qua."
+        reason = f"Điểm kỹ năng / môn học liên quan trong hồ sơ đạt {level:.1f}/10."
+    elif (semester is not None and semesters and max(semesters) + PAST_STAGE_SEMESTERS <= semester
+          and (level is None or level >= WEAK_LEVEL)):
+        status = "already_mastered"
+        description = f"{name} thuộc giai đoạn dành cho kỳ {max(semesters)}, bạn đã đi qua giai đoạn này."
+        reason = f"Sinh viên đang ở kỳ {semester}, muộn hơn kỳ khuyến nghị {PAST_STAGE_SEMESTERS} kỳ trở lên."
+    elif (level is not None and level < WEAK_LEVEL and semester is not None
+          and semesters and min(semesters) <= semester):
+        status = "high_priority"
+        description = f"{name} là nền tảng của giai đoạn bạn đang học nhưng kỹ năng liên quan còn yếu, nên học ngay."
+        reason = f"Điểm kỹ năng / môn học liên quan chỉ {level:.1f}/10 trong khi đã đến kỳ cần học."
+    else:
+        return None
+
+    return {
+        "check": status == "already_mastered",
+        "personalization": {
+            "status": status,
+            "priority": STATUS_PRIORITY[status],
+            "personalized_description": description,
+            "reason": reason,
+        },
+    }
+
+
+def resolve_items(roadmap: dict, profile: dict):
+    """
+    Chạy rule cho mọi item của roadmap.
+    Trả về (resolved: {item_id: {check, personalization}}, ambiguous: [item_id]).
+    """
+    levels = profile_skill_levels(profile)
+    semester = profile.get("current_semester")
+    resolved, ambiguous = {}, []
+    for stage in roadmap.get("stages", []):
+        for area in stage.get("areas", []) or []:
+            for item in area.get("items", []) or []:
+                item_id = item.get("id")
+                if not item_id:
+                    continue
+                decision = resolve_item(item, stage, levels, semester)
+                if decision is None:
+                    ambiguous.append(item_id)
+                else:
+                    resolved[item_id] = decision
+    return resolved, ambiguous
+
+
+def rule_based_items(roadmap: dict, profile: dict) -> dict:
+    """
+    Kết quả cho toàn bộ item chỉ bằng rule: item chắc chắn theo resolve_item,
+    item mơ hồ theo default_item_personalization.
+    """
+    levels = profile_skill_levels(profile)
+    semester = profile.get("current_semester")
+    items = {}
+    for stage in roadmap.get("stages", []):
+        for area in stage.get("areas", []) or []:
+            for item in area.get("items", []) or []:
+                item_id = item.get("id")
+                if item_id:
+                    items[item_id] = (resolve_item(item, stage, levels, semester)
+                                      or default_item_personalization(item, levels))
+    return items
@@ -0,0 +1,112 @@
+"""
+Store embedding của profile user (query /search/ không có câu hỏi, xem
+search_api.build_personalized_query) để search không phải gọi API embedding mỗi lần.
+
+- Mỗi user lưu (version, vector); version = meta.updated_at + hash của text profile,
+  profile đổi thì version đổi -> tính lại ở lần dùng tiếp theo (hoặc khi refresh).
+- Backend "sqlite": lưu ở PROFILE_EMBEDDING_DB, dùng chung giữa các worker và CLI.
+
+Tính trước cho mọi user (users.json + MongoDB), chỉ user mới / đã đổi mới gọi API:
+
+    python -m app.profile_embeddings
+    python -m app.profile_embeddings --users STU001 STU002
+"""
+import argparse
+import asyncio
+import threading
+from typing import Optional
+
+import numpy as np
+
+from .cache import SQLiteStore
+
+
+class ProfileEmbeddingStore:
+    def __init__(self, store: Optional[SQLiteStore] = None):
+        self.store = store
+        self._vectors = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, version: str) -> Optional[np.ndarray]:
+        """
+        Vector của user nếu đã lưu đúng version, không thì None.
+        """
+        with self._lock:
+            entry = self._vectors.get(user_id)
+        if entry is None and self.store is not None:
+            stored = self.store.get(user_id)
+            if stored is not None:
+                entry = (stored[0]["version"], np.asarray(stored[0]["embedding"], dtype=np.float32))
+                with self._lock:
+                    self._vectors[user_id] = entry
+        with self._lock:
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        return None
+
+    def set(self, user_id: str, version: str, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._vectors[user_id] = (version, vector)
+        if self.store is not None:
+            self.store.set(user_id, {"version": version, "embedding": vector.tolist()}, float("inf"))
+
+    def delete(self, user_id: str):
+        with self._lock:
+            self._vectors.pop(user_id, None)
+        if self.store is not None:
+            self.store.delete(user_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._vectors),
+                "hits": self.hits,
+                "misses": self.misses,
+                "persistent": self.store is not None,
+            }
+
+
+def make_store(backend: str, db_path=None) -> ProfileEmbeddingStore:
+    if backend == "memory":
+        return ProfileEmbeddingStore()
+    if backend == "sqlite":
+        return ProfileEmbeddingStore(SQLiteStore(db_path, table="profile_embeddings"))
+    raise ValueError(f"Unknown profile embedding backend: {backend}")
+
+
+async def _main(args):
+    from . import clova_client, mongo
+    from . import personalize_api, search_api
+
+    try:
+        user_ids = args.users or await personalize_api.all_user_ids()
+        profiles = {}
+        for user_id in user_ids:
+            profile = await personalize_api.fetch_profile(user_id)
+            if profile is not None:
+                profiles[user_id] = profile
+        stats = await search_api.refresh_profile_embeddings(profiles, progress=True)
+    finally:
+        await clova_client.aclose()
+        mongo.close()
+    print(f"{len(profiles)} profiles: {stats['computed']} computed, {stats['fresh']} up to date, "
+          f"{stats['failed']} failed")
+    for err in stats["errors"]:
+        print(f"  {err['user_id']}: {err['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tính trước embedding profile user (chỉ user mới / đã đổi)")
+    parser.add_argument("--users", nargs="+", default=None,
+                        help="user_id cần tính (mặc định: mọi user trong users.json + MongoDB)")
+    args = parser.parse_args(argv)
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .config import CLOVA_RATE_LIMIT_BACKEND, CLOVA_RATE_LIMIT_DB, CLOVA_RATE_LIMITS
+
+
+def _refill_and_take(tokens: float, updated: float, now: float, rate: float, capacity: float):
+    """
+    Token bucket kiểu "reservation": luôn lấy 1 token, cho phép số token âm.
+    Số token âm = hàng đợi; thời gian chờ = phần thiếu / tốc độ refill.
+    Trả về (tokens mới, số giây phải chờ).
+    """
+    tokens = min(capacity, tokens + (now - updated) * rate) - 1.0
+    wait = -tokens / rate if tokens < 0 else 0.0
+    return tokens, wait
+
+
+class MemoryBackend:
+    """
+    Bucket trong bộ nhớ, chỉ có hiệu lực trong một process.
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def reserve(self, name: str, rate: float, capacity: float) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(name, (capacity, now))
+            tokens, wait = _refill_and_take(tokens, updated, now, rate, capacity)
+            self._buckets[name] = (tokens, now)
+        return wait
+
+
+class SQLiteBackend:
+    """
+    Bucket lưu trong file SQLite, dùng chung giữa các worker uvicorn / script
+    trên cùng máy. Mỗi lần reserve là một transaction BEGIN IMMEDIATE
+    (có thể chờ lock file tới 30s khi nhiều worker tranh nhau -> không gọi trên event loop).
+    """
+
+    blocking = True
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, timeout=30, isolation_level=None
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def reserve(self, name: str, rate: float, capacity: float) -> float:
+        # time.time() vì các process không chung mốc monotonic
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                now = time.time()
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM buckets WHERE name = ?", (name,)
+                ).fetchone()
+                tokens, updated = row if row else (capacity, now)
+                tokens, wait = _refill_and_take(tokens, updated, now, rate, capacity)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                    (name, tokens, now),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+class RateLimiter:
+    """
+    Token bucket cho từng endpoint CLOVA (embedding / reranker / chat).
+    limits: {endpoint: (requests_per_minute, burst)}
+    Request vượt quota được xếp hàng (chờ tới lượt) thay vì bắn đi rồi dính 429.
+    """
+
+    def __init__(self, limits: dict, backend=None):
+        self.limits = limits
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def reserve(self, endpoint: str) -> float:
+        """
+        Lấy một lượt cho endpoint, trả về số giây cần chờ trước khi gửi request.
+        """
+        limit = self.limits.get(endpoint)
+        if self.backend is None or limit is None:
+            return 0.0
+        rpm, burst = limit
+        wait = self.backend.reserve(endpoint, rpm / 60.0, max(burst, 1.0))
+        self._record(endpoint, wait)
+        return wait
+
+    async def acquire(self, endpoint: str):
+        if getattr(self.backend, "blocking", False):
+            wait = await asyncio.to_thread(self.reserve, endpoint)
+        else:
+            wait = self.reserve(endpoint)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, endpoint: str):
+        wait = self.reserve(endpoint)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _record(self, endpoint: str, wait: float):
+        with self._lock:
+            m = self._metrics.setdefault(
+                endpoint, {"requests": 0, "queued": 0, "total_wait": 0.0, "max_wait": 0.0}
+            )
+            m["requests"] += 1
+            if wait > 0:
+                m["queued"] += 1
+                m["total_wait"] += wait
+                m["max_wait"] = max(m["max_wait"], wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for endpoint, m in self._metrics.items():
+                rpm, burst = self.limits.get(endpoint, (None, None))
+                result[endpoint] = {
+                    **m,
+                    "avg_wait": m["total_wait"] / m["requests"] if m["requests"] else 0.0,
+                    "rpm": rpm,
+                    "burst": burst,
+                }
+            return result
+
+
+def _build_backend(kind: str):
+    if kind == "off":
+        return None
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(CLOVA_RATE_LIMIT_DB)
+    raise ValueError(f"Unknown CLOVA_RATE_LIMIT_BACKEND: {kind}")
+
+
+_limiter = None
+
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter(CLOVA_RATE_LIMITS, _build_backend(CLOVA_RATE_LIMIT_BACKEND))
+    return _limiter
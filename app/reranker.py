@@ -0,0 +1,131 @@
+"""
+Reranker cho /search_rerank/:
+- ClovaReranker: CLOVA Studio reranker (remote, có sinh câu trả lời).
+- LocalReranker: chấm điểm lại trên CPU từ các feature đơn giản (điểm retrieval,
+  độ trùng từ khoá của câu hỏi với text / skill_tags của item), không gọi API.
+- should_skip_rerank: bỏ qua reranker remote khi điểm retrieval đã tách biệt rõ.
+
+Mỗi reranker nhận documents dạng [{"id", "doc", "score"}] (theo thứ tự retrieval) và trả về
+{"answer": str, "documents": [...], "raw": dict}.
+"""
+import re
+
+import numpy as np
+
+from . import clova_client
+from .config import NCP_API_KEY
+from .lexical_index import tokenize
+
+RERANKER_API_URL = "https://clovastudio.stream.ntruss.com/v1/api-tools/reranker"
+
+_TAGS_RE = re.compile(r"^Tags:(.*)$", re.MULTILINE)
+
+
+class ClovaReranker:
+    name = "clova"
+
+    async def call(self, documents: list, query: str) -> dict:
+        if not NCP_API_KEY:
+            raise RuntimeError("NCP_API_KEY is not set in environment variables.")
+
+        headers = {
+            'Authorization': f'Bearer {str(NCP_API_KEY)}',
+            'Content-Type': 'application/json; charset=utf-8',
+            'X-NCP-CLOVASTUDIO-REQUEST-ID': '16b838f6e947430298b7e2563948b402'
+        }
+
+        payload = {
+            'documents': [{"id": d["id"], "doc": d["doc"]} for d in documents],
+            'query': query,
+            'maxTokens': 1024,
+        }
+
+        return await clova_client.post_json('reranker', RERANKER_API_URL, headers, payload)
+
+    async def rerank(self, query: str, documents: list) -> dict:
+        raw = await self.call(documents, query)
+        return {
+            "answer": raw.get("result", {}).get("result", ""),
+            "documents": documents,
+            "raw": raw,
+        }
+
+
+class LocalReranker:
+    """
+    score = w_retrieval * điểm retrieval (min-max trong tập doc)
+          + w_terms * tỉ lệ từ của câu hỏi có trong text của doc
+          + w_tags * tỉ lệ từ của câu hỏi có trong dòng "Tags:" (skill_tags) của doc
+    """
+    name = "local"
+
+    def __init__(self, w_retrieval: float = 0.5, w_terms: float = 0.3, w_tags: float = 0.2):
+        self.weights = np.array([w_retrieval, w_terms, w_tags], dtype=np.float32)
+
+    def features(self, query: str, documents: list) -> np.ndarray:
+        q_terms = set(tokenize(query))
+        feats = np.zeros((len(documents), 3), dtype=np.float32)
+        if not documents:
+            return feats
+
+        scores = np.array([d.get("score") or 0.0 for d in documents], dtype=np.float32)
+        span = scores.max() - scores.min()
+        feats[:, 0] = (scores - scores.min()) / span if span > 0 else 1.0
+
+        if q_terms:
+            for i, d in enumerate(documents):
+                text = d.get("doc", "")
+                feats[i, 1] = len(q_terms & set(tokenize(text))) / len(q_terms)
+                tags = " ".join(_TAGS_RE.findall(text))
+                feats[i, 2] = len(q_terms & set(tokenize(tags))) / len(q_terms)
+        return feats
+
+    async def rerank(self, query: str, documents: list) -> dict:
+        scores = self.features(query, documents) @ self.weights
+        order = np.argsort(-scores, kind="stable")
+        ranked = [{**documents[i], "rerank_score": float(scores[i])} for i in order]
+        return {
+            "answer": "",
+            "documents": ranked,
+            "raw": {"reranker": self.name, "weights": self.weights.tolist()},
+        }
+
+
+RERANKERS = {
+    "clova": ClovaReranker,
+    "local": LocalReranker,
+}
+
+_instances = {}
+
+
+def get_reranker(name: str):
+    reranker = _instances.get(name)
+    if reranker is None:
+        if name not in RERANKERS:
+            raise ValueError(f"Unknown reranker '{name}' (expected one of: {', '.join(RERANKERS)})")
+        reranker = RERANKERS[name]()
+        _instances[name] = reranker
+    return reranker
+
+
+def score_gap(scores, top: int = 1) -> float:
+    """
+    Khoảng cách nhỏ nhất giữa các hạng liền kề trong `top` hạng đầu, chia cho điểm hạng 1
+    (top=1: (s1 - s2) / s1). Dùng tỉ lệ để cùng ngưỡng áp dụng được cho cosine / BM25 / RRF.
+    """
+    scores = np.sort(np.asarray(scores, dtype=np.float32))[::-1]
+    if len(scores) < 2:
+        return float("inf")
+    if scores[0] <= 0:
+        return 0.0
+    gaps = (scores[:-1] - scores[1:]) / scores[0]
+    return float(gaps[:max(1, top)].min())
+
+
+def should_skip_rerank(scores, min_gap: float, top: int = 1) -> bool:
+    """
+    True nếu thứ tự retrieval đã đủ rõ (gap >= min_gap) -> không cần gọi reranker remote.
+    min_gap <= 0: không bao giờ bỏ qua.
+    """
+    return min_gap > 0 and score_gap(scores, top) >= min_gap
@@ -0,0 +1,323 @@
+"""
+Pipeline build index cho roadmap: JSON (data/jobs) -> doc phẳng -> embedding -> index.
+
+Dùng như thư viện (build_indexes / build_missing_indexes) hoặc CLI:
+
+    python -m app.roadmap_build                      # build incremental mọi career
+    python -m app.roadmap_build --jobs machine_learning data_analyst
+    python -m app.roadmap_build --full --dtype float16
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from . import clova_client
+from .config import (
+    CLOVA_CONCURRENCY,
+    EMBEDDING_API_URL,
+    EMBEDDINGS_DIR,
+    JOBS_DIR,
+    BUILD_PARALLEL_CAREERS,
+)
+from .roadmap_index import META_FIELDS, save_index_artifact
+
+
+def list_jobs(jobs_dir: Path = JOBS_DIR) -> List[str]:
+    return sorted(p.stem for p in Path(jobs_dir).glob("*.json"))
+
+
+def build_doc_text(career_id: str, career_name: str, stage: dict, area: dict, item: dict) -> str:
+    """
+    Text dùng để embed cho một item (theo schema data/jobs: name / skill_tags).
+    """
+    tags = ", ".join(item.get("skill_tags", []) or [])
+    recommended_semesters = stage.get("recommended_semesters", "")
+    return (
+        f"Nghề: {career_name} ({career_id})\n"
+        f"Giai đoạn: {stage.get('name', '')}\n"
+        f"Lĩnh vực: {area.get('name', '')}\n"
+        f"Mục: {item.get('name', '')}\n"
+        f"Mô tả: {item.get('description', '')}\n"
+        f"Tags: {tags}\n"
+        f"Kỳ khuyến nghị: {recommended_semesters}"
+    )
+
+
+def iter_roadmap_docs(roadmap: dict) -> Iterator[dict]:
+    """
+    Duyệt roadmap JSON, sinh từng doc phẳng: doc_id/career_id/stage_id/area_id/text.
+    """
+    career_id = roadmap["career_id"]
+    career_name = roadmap.get("career_name", "")
+
+    for stage in roadmap.get("stages", []):
+        for area in stage.get("areas", []) or []:
+            for item in area.get("items", []) or []:
+                yield {
+                    "doc_id": item["id"],
+                    "career_id": career_id,
+                    "stage_id": stage["id"],
+                    "area_id": area["id"],
+                    "text": build_doc_text(career_id, career_name, stage, area, item),
+                }
+
+
+def load_roadmap_docs(job: str, jobs_dir: Path = JOBS_DIR) -> List[dict]:
+    with open(Path(jobs_dir) / f"{job}.json", "r", encoding="utf-8") as f:
+        return list(iter_roadmap_docs(json.load(f)))
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(str(text).encode("utf-8")).hexdigest()
+
+
+def _paths(job: str, out_dir: Path) -> dict:
+    out_dir = Path(out_dir)
+    return {
+        "csv": out_dir / f"{job}_embeddings.csv",
+        "npy": out_dir / f"{job}_embeddings.npy",
+        "manifest": out_dir / f"{job}_embeddings.manifest.json",
+        "checkpoint": out_dir / f"{job}_embeddings.partial.jsonl",
+    }
+
+
+def load_manifest(path: Path) -> dict:
+    """
+    Manifest của lần build trước: {"model": ..., "docs": {doc_id: text_hash}}.
+    """
+    if not Path(path).exists():
+        return {"model": None, "docs": {}}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_previous_embeddings(paths: dict) -> dict:
+    """
+    Embedding đã có từ lần build trước theo doc_id (ưu tiên CSV, fallback .npy).
+    """
+    if paths["csv"].exists():
+        prev = pd.read_csv(paths["csv"], encoding="utf-8-sig")
+        return {row["doc_id"]: json.loads(row["embedding"]) for row in prev.to_dict("records")}
+    if paths["npy"].exists():
+        from .roadmap_index import RoadmapIndex
+
+        try:
+            index = RoadmapIndex.from_artifact(paths["npy"])
+        except ValueError:
+            # artifact lệch với meta -> embed lại
+            return {}
+        matrix = np.asarray(index.matrix, dtype=np.float32)
+        return {doc_id: matrix[i].tolist() for i, doc_id in enumerate(index.doc_ids)}
+    return {}
+
+
+def load_checkpoint(path: Path, hashes: dict) -> dict:
+    """
+    Đọc checkpoint dạng JSONL: mỗi dòng {"doc_id": ..., "text_hash": ..., "embedding": [...]}.
+    Dòng cuối bị ghi dở (process bị kill) thì bỏ qua; dòng có text_hash khác hashes[doc_id]
+    (text đã sửa sau lần chạy bị dừng, hoặc doc đã bị xoá) cũng bỏ để embed lại.
+    """
+    done = {}
+    if not Path(path).exists():
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if rec.get("text_hash") is None or rec.get("text_hash") != hashes.get(rec.get("doc_id")):
+                continue
+            done[rec["doc_id"]] = rec["embedding"]
+    return done
+
+
+def write_json_atomic(path: Path, data):
+    tmp_path = Path(str(path) + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def write_index(job: str, docs: List[dict], embeddings: dict, hashes: dict,
+                out_dir: Path, dtype: str = "float32"):
+    """
+    Ghi CSV embedding + artifact .npy/.meta.json, manifest ghi sau cùng.
+    Mọi file đều ghi ra file tạm rồi os.replace.
+    """
+    paths = _paths(job, out_dir)
+    rows = [{**{f: d[f] for f in META_FIELDS}, "embedding": embeddings[d["doc_id"]]} for d in docs]
+
+    tmp_csv = Path(str(paths["csv"]) + ".tmp")
+    pd.DataFrame(rows).to_csv(tmp_csv, index=False, encoding="utf-8-sig")
+    os.replace(tmp_csv, paths["csv"])
+
+    save_index_artifact(paths["npy"], [r["embedding"] for r in rows], rows, dtype=dtype)
+    write_json_atomic(paths["manifest"], {"model": EMBEDDING_API_URL, "docs": hashes})
+
+
+async def build_career(job: str, out_dir: Path = EMBEDDINGS_DIR, workers: Optional[int] = None,
+                       dtype: str = "float32", full: bool = False, progress: bool = False,
+                       jobs_dir: Path = JOBS_DIR) -> dict:
+    """
+    Build index cho 1 career, đọc thẳng từ data/jobs/<job>.json.
+    - Incremental: doc có (doc_id, hash text, model) trùng manifest thì dùng lại
+      embedding cũ, chỉ gọi API cho doc mới / đổi text; doc đã bị xoá sẽ bị bỏ.
+      full=True để embed lại toàn bộ.
+    - Mỗi doc embed xong được append vào <job>_embeddings.partial.jsonl (kèm hash text),
+      chạy lại sẽ tiếp tục từ checkpoint (full=True bỏ qua và ghi lại checkpoint từ đầu).
+    Trả về thống kê: total / embedded / reused / removed / seconds.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    paths = _paths(job, out_dir)
+    workers = workers or CLOVA_CONCURRENCY["embedding"]
+
+    docs = load_roadmap_docs(job, jobs_dir)
+    hashes = {d["doc_id"]: text_hash(d["text"]) for d in docs}
+    manifest = load_manifest(paths["manifest"])
+    removed = len(set(manifest["docs"]) - set(hashes))
+
+    done = {}
+    if not full and manifest.get("model") == EMBEDDING_API_URL:
+        previous = load_previous_embeddings(paths)
+        for doc_id, h in hashes.items():
+            if manifest["docs"].get(doc_id) == h and doc_id in previous:
+                done[doc_id] = previous[doc_id]
+    reused = len(done)
+    stats = {"job": job, "total": len(docs), "embedded": 0, "reused": reused,
+             "removed": removed, "seconds": 0.0}
+
+    if reused == len(docs) and not removed and paths["npy"].exists():
+        paths["checkpoint"].unlink(missing_ok=True)
+        return stats
+
+    if not full:
+        done.update(load_checkpoint(paths["checkpoint"], hashes))
+    queue = asyncio.Queue()
+    for d in docs:
+        if d["doc_id"] not in done:
+            queue.put_nowait(d)
+
+    bar = None
+    if progress:
+        from tqdm import tqdm
+
+        bar = tqdm(total=len(docs), initial=len(docs) - queue.qsize(),
+                   desc=f"Generating embeddings for {job}", unit="rows")
+
+    started = time.perf_counter()
+    try:
+        with open(paths["checkpoint"], "w" if full else "a", encoding="utf-8") as ckpt:
+
+            async def worker():
+                while True:
+                    try:
+                        d = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    emb = await clova_client.embed(d["text"])
+                    done[d["doc_id"]] = emb
+                    ckpt.write(json.dumps({"doc_id": d["doc_id"], "text_hash": hashes[d["doc_id"]],
+                                           "embedding": emb}) + "\n")
+                    ckpt.flush()
+                    stats["embedded"] += 1
+                    if bar is not None:
+                        bar.update(1)
+
+            async with asyncio.TaskGroup() as tg:
+                for _ in range(max(1, workers)):
+                    tg.create_task(worker())
+    finally:
+        if bar is not None:
+            bar.close()
+
+    stats["seconds"] = time.perf_counter() - started
+    write_index(job, docs, done, hashes, out_dir, dtype=dtype)
+    paths["checkpoint"].unlink(missing_ok=True)
+    return stats
+
+
+async def build_indexes(jobs: Optional[List[str]] = None, out_dir: Path = EMBEDDINGS_DIR,
+                        parallel: int = BUILD_PARALLEL_CAREERS, **kwargs) -> List[dict]:
+    """
+    Build nhiều career song song (tối đa `parallel` career cùng lúc).
+    Các career dùng chung HTTP client + rate limiter nên không vượt quota.
+    """
+    jobs = jobs or list_jobs()
+    sem = asyncio.Semaphore(max(1, parallel))
+
+    async def run(job):
+        async with sem:
+            return await build_career(job, out_dir=out_dir, **kwargs)
+
+    return await asyncio.gather(*(run(job) for job in jobs))
+
+
+async def build_missing_indexes(out_dir: Path = EMBEDDINGS_DIR, **kwargs) -> List[dict]:
+    """
+    Chỉ build career chưa có artifact .npy (dùng lúc service khởi động).
+    """
+    missing = [job for job in list_jobs() if not _paths(job, out_dir)["npy"].exists()]
+    if not missing:
+        return []
+    return await build_indexes(missing, out_dir=out_dir, **kwargs)
+
+
+def format_stats(stats: dict) -> str:
+    rate = stats["embedded"] / stats["seconds"] if stats["seconds"] else 0.0
+    return (
+        f"{stats['job']}: {stats['total']} rows, embedded {stats['embedded']} "
+        f"({rate:.1f} rows/sec), reused {stats['reused']}, removed {stats['removed']}"
+    )
+
+
+async def _main(args):
+    try:
+        results = await build_indexes(
+            args.jobs,
+            out_dir=args.out_dir,
+            parallel=args.parallel,
+            workers=args.workers,
+            dtype=args.dtype,
+            full=args.full,
+            progress=True,
+        )
+    finally:
+        await clova_client.aclose()
+    for stats in results:
+        print(format_stats(stats))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build embedding index cho roadmap từ data/jobs")
+    parser.add_argument("--jobs", nargs="+", default=None,
+                        help="Chỉ build các career này (tên file trong data/jobs, không có .json)")
+    parser.add_argument("--out-dir", type=Path, default=EMBEDDINGS_DIR)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32",
+                        help="Kiểu dữ liệu của ma trận trong artifact .npy")
+    parser.add_argument("--workers", type=int, default=CLOVA_CONCURRENCY["embedding"],
+                        help="Số request embedding song song cho mỗi career")
+    parser.add_argument("--parallel", type=int, default=BUILD_PARALLEL_CAREERS,
+                        help="Số career build song song")
+    parser.add_argument("--full", action="store_true",
+                        help="Embed lại toàn bộ, bỏ qua manifest của lần build trước")
+    args = parser.parse_args(argv)
+
+    unknown = set(args.jobs or []) - set(list_jobs())
+    if unknown:
+        parser.error(f"Unknown jobs: {', '.join(sorted(unknown))}")
+
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
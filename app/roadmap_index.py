@@ -0,0 +1,316 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .lexical_index import BM25Index, rrf_fuse
+
+META_FIELDS = ("doc_id", "career_id", "stage_id", "area_id", "text")
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize từng dòng của ma trận (dòng có norm = 0 giữ nguyên = 0).
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def normalize_vector(vec) -> np.ndarray:
+    vec = np.asarray(vec, dtype=np.float32)
+    n = np.linalg.norm(vec)
+    return vec / n if n else vec
+
+
+def top_k_indices(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """
+    Lấy index của top_k điểm cao nhất (giảm dần) bằng argpartition,
+    chỉ sort phần top_k thay vì toàn bộ mảng.
+    """
+    n = scores.shape[0]
+    if top_k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if top_k < n:
+        idx = np.argpartition(-scores, top_k - 1)[:top_k]
+    else:
+        idx = np.arange(n)
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class EmbeddingDimError(ValueError):
+    """
+    Query embedding khác số chiều với ma trận của index (vd. artifact build bằng model khác).
+    """
+
+
+class RoadmapIndex:
+    """
+    Index embedding của roadmap nằm trong bộ nhớ:
+    - matrix: ma trận float32 liên tục, đã L2-normalize (n_docs x dim)
+    - doc_ids / career_ids / stage_ids / area_ids / texts: mảng song song theo dòng
+    Cosine similarity = matrix @ q (q đã normalize).
+    """
+
+    def __init__(self, matrix, doc_ids, career_ids, stage_ids, area_ids, texts,
+                 normalized: bool = False):
+        # normalized=True: matrix đã normalize sẵn (vd. memmap từ .npy) -> giữ nguyên, không copy
+        self.matrix = matrix if normalized else normalize_rows(matrix)
+        self.doc_ids = np.asarray(doc_ids, dtype=object)
+        self.career_ids = np.asarray(career_ids, dtype=object)
+        self.stage_ids = np.asarray(stage_ids, dtype=object)
+        self.area_ids = np.asarray(area_ids, dtype=object)
+        self.texts = np.asarray(texts, dtype=object)
+        self._masks = {}
+        self._lexical = None
+        # Vector index cho search dense (xem app/vector_index.py); None = brute force trên matrix
+        self.vector_index = None
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1] if self.matrix.ndim == 2 else 0
+
+    def accepts(self, q_emb) -> bool:
+        return np.shape(q_emb)[-1] == self.dim
+
+    def check_query(self, q_emb):
+        if not self.accepts(q_emb):
+            raise EmbeddingDimError(
+                f"Query embedding has dim {np.shape(q_emb)[-1]} but the index has dim {self.dim} "
+                "(rebuild the index with python -m app.roadmap_build)"
+            )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RoadmapIndex":
+        """
+        Tạo index từ DataFrame của file *_embeddings.csv
+        (cột embedding là list dạng chuỗi).
+        Parse cả cột trong một lần json.loads thay vì ast.literal_eval từng dòng.
+        """
+        emb_col = df["embedding"].astype(str)
+        matrix = np.asarray(json.loads("[" + ",".join(emb_col) + "]"), dtype=np.float32)
+        return cls(
+            matrix=matrix,
+            doc_ids=df["doc_id"].to_numpy(),
+            career_ids=df["career_id"].to_numpy(),
+            stage_ids=df["stage_id"].to_numpy() if "stage_id" in df else [""] * len(df),
+            area_ids=df["area_id"].to_numpy() if "area_id" in df else [""] * len(df),
+            texts=df["text"].to_numpy(),
+        )
+
+    @classmethod
+    def from_artifact(cls, npy_path: Path) -> "RoadmapIndex":
+        """
+        Load artifact nhị phân do scripts/embed_roadmap.py sinh ra:
+        - <name>.npy: ma trận đã normalize (float32/float16), mở bằng mmap
+          để các worker uvicorn dùng chung page cache của OS
+        - <name>.meta.json: doc_id/career_id/stage_id/area_id/text + rows/dim/sha256 của ma trận
+        ValueError nếu meta không khớp với ma trận (vd. process bị kill giữa hai lần ghi file).
+        """
+        npy_path = Path(npy_path)
+        matrix = np.load(npy_path, mmap_mode="r")
+        with open(artifact_meta_path(npy_path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        check_artifact(matrix, meta, npy_path)
+        return cls(
+            matrix=matrix,
+            doc_ids=meta["doc_id"],
+            career_ids=meta["career_id"],
+            stage_ids=meta["stage_id"],
+            area_ids=meta["area_id"],
+            texts=meta["text"],
+            normalized=True,
+        )
+
+    @classmethod
+    def stack(cls, indexes: list) -> "RoadmapIndex":
+        """
+        Gộp nhiều index (mỗi career một index) thành một index duy nhất
+        để search toàn bộ roadmap trong một lần nhân ma trận.
+        """
+        indexes = [ix for ix in indexes if len(ix)]
+        if not indexes:
+            raise ValueError("No roadmap index to stack")
+        return cls(
+            matrix=np.vstack([np.asarray(ix.matrix) for ix in indexes]),
+            doc_ids=np.concatenate([ix.doc_ids for ix in indexes]),
+            career_ids=np.concatenate([ix.career_ids for ix in indexes]),
+            stage_ids=np.concatenate([ix.stage_ids for ix in indexes]),
+            area_ids=np.concatenate([ix.area_ids for ix in indexes]),
+            texts=np.concatenate([ix.texts for ix in indexes]),
+            normalized=True,
+        )
+
+    def _value_mask(self, field: str, value: str) -> np.ndarray:
+        # Mask boolean cho từng (field, value) được tính một lần rồi cache lại
+        key = (field, value)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = getattr(self, field) == value
+            self._masks[key] = mask
+        return mask
+
+    def mask(self, career_ids=None, stage_ids=None, area_ids=None):
+        """
+        Mask lọc doc: OR giữa các giá trị trong cùng một field, AND giữa các field.
+        Trả về None nếu không có filter nào.
+        """
+        result = None
+        for field, values in (
+            ("career_ids", career_ids),
+            ("stage_ids", stage_ids),
+            ("area_ids", area_ids),
+        ):
+            if not values:
+                continue
+            field_mask = np.zeros(len(self), dtype=bool)
+            for v in values:
+                field_mask |= self._value_mask(field, v)
+            result = field_mask if result is None else result & field_mask
+        return result
+
+    def scores(self, q_emb, rows=None) -> np.ndarray:
+        """
+        Cosine của q_emb với mọi doc, hoặc chỉ với các dòng trong rows (mảng index).
+        """
+        self.check_query(q_emb)
+        q = normalize_vector(q_emb)
+        if self.matrix.dtype != np.float32:
+            q = q.astype(self.matrix.dtype)
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        return np.asarray(matrix @ q, dtype=np.float32)
+
+    def scores_many(self, q_embs) -> np.ndarray:
+        """
+        Cosine của nhiều query cùng lúc: một phép nhân (m x dim) @ (dim x n_docs) -> (m x n_docs).
+        """
+        self.check_query(q_embs)
+        q = normalize_rows(np.atleast_2d(q_embs))
+        if self.matrix.dtype != np.float32:
+            q = q.astype(self.matrix.dtype)
+        return np.asarray(q @ self.matrix.T, dtype=np.float32)
+
+    def search(self, q_emb, top_k: int, mask=None, scores=None):
+        """
+        Trả về (indices, scores) của top_k doc gần nhất với q_emb.
+        mask: mảng bool (xem RoadmapIndex.mask) để giới hạn tập doc.
+        scores: cosine đã tính sẵn cho mọi doc (vd. một dòng của scores_many) -> bỏ qua q_emb.
+        Có vector_index (vd. IVF) thì search qua index đó thay vì quét toàn bộ matrix.
+        """
+        if scores is None and self.vector_index is not None:
+            self.check_query(q_emb)
+            return self.vector_index.search(q_emb, top_k, mask=mask)
+        return self._top_k(self.scores(q_emb) if scores is None else scores, top_k, mask)
+
+    @property
+    def lexical(self) -> BM25Index:
+        # BM25 trên texts, build ở lần dùng đầu tiên (warm_up gọi sẵn)
+        if self._lexical is None:
+            self._lexical = BM25Index(self.texts)
+        return self._lexical
+
+    def search_lexical(self, query: str, top_k: int, mask=None):
+        """
+        Như search nhưng chấm điểm bằng BM25 trên text (không cần embedding).
+        Doc không khớp term nào bị loại.
+        """
+        scores = self.lexical.scores(query)
+        matched = scores > 0
+        return self._top_k(scores, top_k, matched if mask is None else mask & matched)
+
+    def search_hybrid(self, q_emb, query: str, top_k: int, mask=None, rrf_k: int = 60,
+                      dense_k: int = 100, scores=None):
+        """
+        Gộp thứ hạng cosine và BM25 bằng reciprocal-rank fusion, trả về (indices, điểm RRF).
+        scores: cosine đã tính sẵn cho mọi doc (như search).
+        Có vector_index: chỉ fuse trên dense_k doc lấy từ vector_index + các doc khớp BM25
+        (cosine chỉ tính trên tập đó) thay vì trên toàn bộ index.
+        """
+        lexical = self.lexical.scores(query)
+        if scores is not None or self.vector_index is None:
+            candidates = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+            dense = (self.scores(q_emb) if scores is None else scores)[candidates]
+        else:
+            matched = lexical > 0
+            if mask is not None:
+                matched &= mask
+            self.check_query(q_emb)
+            dense_idx, _ = self.vector_index.search(q_emb, max(top_k, dense_k), mask=mask)
+            candidates = np.union1d(dense_idx, np.flatnonzero(matched))
+            dense = self.scores(q_emb, rows=candidates)
+        lexical = lexical[candidates]
+        fused = rrf_fuse([dense, lexical], k=rrf_k, ignore_zero=[1])
+        order = top_k_indices(fused, top_k)
+        return candidates[order], fused[order]
+
+    def _top_k(self, scores: np.ndarray, top_k: int, mask=None):
+        if mask is None:
+            idx = top_k_indices(scores, top_k)
+        else:
+            candidates = np.flatnonzero(mask)
+            idx = candidates[top_k_indices(scores[candidates], top_k)]
+        return idx, scores[idx]
+
+
+def artifact_meta_path(npy_path: Path) -> Path:
+    npy_path = Path(npy_path)
+    return npy_path.with_name(npy_path.stem + ".meta.json")
+
+
+def matrix_sha256(matrix) -> str:
+    return hashlib.sha256(np.ascontiguousarray(matrix).tobytes()).hexdigest()
+
+
+def check_artifact(matrix, meta: dict, npy_path: Path = None):
+    """
+    Kiểm tra meta.json và ma trận .npy thuộc cùng một lần ghi.
+    Meta cũ (chưa có rows / sha256) chỉ được kiểm tra số dòng theo doc_id.
+    """
+    rows = meta.get("rows", len(meta.get("doc_id", [])))
+    ok = matrix.ndim == 2 and matrix.shape[0] == rows and len(meta.get("doc_id", [])) == rows
+    if ok and meta.get("dim"):
+        ok = matrix.shape[1] == meta["dim"]
+    if ok and meta.get("sha256"):
+        ok = matrix_sha256(matrix) == meta["sha256"]
+    if not ok:
+        raise ValueError(f"Index artifact {npy_path or ''} does not match its metadata")
+
+
+def save_index_artifact(npy_path: Path, embeddings, docs: list, dtype: str = "float32"):
+    """
+    Ghi artifact nhị phân cho một career.
+    - embeddings: list/array (n_docs x dim), sẽ được normalize trước khi ghi
+    - docs: list dict có các key trong META_FIELDS, cùng thứ tự với embeddings
+    - dtype: "float32" hoặc "float16"
+    Ghi ra file tạm rồi os.replace để worker đang đọc không thấy file dở dang; ma trận được
+    thay trước, meta (kèm rows / sha256 của ma trận) sau cùng, from_artifact từ chối cặp lệch nhau.
+    """
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"Unsupported dtype: {dtype}")
+
+    npy_path = Path(npy_path)
+    matrix = normalize_rows(np.asarray(embeddings, dtype=np.float32)).astype(dtype)
+    meta = {field: [str(d.get(field, "")) for d in docs] for field in META_FIELDS}
+    meta["dtype"] = dtype
+    meta["dim"] = int(matrix.shape[1]) if matrix.ndim == 2 else 0
+    meta["rows"] = int(matrix.shape[0])
+    meta["sha256"] = matrix_sha256(matrix)
+
+    meta_path = artifact_meta_path(npy_path)
+    tmp_npy = npy_path.with_name(npy_path.name + ".tmp")
+    tmp_meta = meta_path.with_name(meta_path.name + ".tmp")
+
+    with open(tmp_npy, "wb") as f:
+        np.save(f, matrix)
+    with open(tmp_meta, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    os.replace(tmp_npy, npy_path)
+    os.replace(tmp_meta, meta_path)
@@ -1,47 +1,94 @@
-import os
-import json
-import ast
+import time
+import asyncio
+import httpx
 import numpy as np
 import pandas as pd
-from numpy import dot
-from numpy.linalg import norm
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from typing import List, Optional
-from pathlib import Path
-from dotenv import load_dotenv
-import requests
-import random
-import time
-from typing import List, Optional
-
-EMBEDDING_API_URL = "https://clovastudio.stream.ntruss.com/v1/api-tools/embedding/v2"
-RERANKER_API_URL = "https://clovastudio.stream.ntruss.com/v1/api-tools/reranker"
-
-BASE_DIR = Path(__file__).resolve().parent.parent  
-
-load_dotenv(BASE_DIR.parent / '.env.local')
-
-NCP_API_KEY = os.getenv("NCP_API_KEY")
-
-app = FastAPI()
-
-def get_embedding(text):
-    headers = {
-        'Content-Type': 'application/json; charset=utf-8',
-        'Authorization': f'Bearer {str(NCP_API_KEY)}',
-        'X-NCP-CLOVASTUDIO-REQUEST-ID': '5bf30d7bddc94b9694304d0d88f0cef6'
-    }
-
-    data = {'text': text}
-
-    r = requests.post(EMBEDDING_API_URL, headers=headers, json=data)
-    r.raise_for_status()
-    time.sleep(random.uniform(0.3, 0.7)) 
-    return r.json()['result']['embedding']
-
-def cosine_similarity(vec1, vec2):
-    return dot(vec1, vec2) / (norm(vec1) * norm(vec2))
+from typing import List, Literal, Optional
+from functools import lru_cache
+from contextlib import asynccontextmanager
+
+from . import clova_client
+from . import skill_gap
+from .cache import LRUTTLCache, SQLiteStore, hash_key
+from .config import (
+    BASE_DIR,
+    NCP_API_KEY,
+    EMBEDDING_API_URL,
+    BUILD_INDEXES_ON_STARTUP,
+    EMBEDDING_CACHE_SIZE,
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_DB,
+    SEARCH_MODE,
+    SEARCH_RRF_K,
+    RERANKER,
+    RERANK_SKIP_GAP,
+    RERANK_SKIP_TOP,
+    VECTOR_INDEX,
+    VECTOR_INDEX_MIN_DOCS,
+    IVF_NLIST,
+    IVF_NPROBE,
+    PROFILE_EMBEDDING_BACKEND,
+    PROFILE_EMBEDDING_DB,
+    PROFILE_EMBEDDINGS_ON_STARTUP,
+    SEARCH_QUERY_EMBEDDING,
+    SEARCH_QUESTION_WEIGHT,
+    USERS_RELOAD_INTERVAL,
+    SEARCH_SKILL_GAP_WEIGHT,
+)
+from .profile_embeddings import make_store
+from .rate_limit import get_limiter
+from .reranker import get_reranker, should_skip_rerank
+from .roadmap_build import build_missing_indexes
+from .roadmap_index import RoadmapIndex, normalize_vector
+from .user_store import UserProfile, UserStore
+from .vector_index import make_vector_index
+
+# Trạng thái warm-up, /ready chỉ trả 200 khi ready = True
+READINESS = {"ready": False, "careers": 0, "docs": 0, "seconds": None, "error": None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm-up chạy nền: server vẫn nhận request, load balancer dựa vào /ready
+    task = asyncio.create_task(run_warm_up())
+    background = []
+    if PROFILE_EMBEDDINGS_ON_STARTUP:
+        background.append(asyncio.create_task(refresh_profile_embeddings(USERS)))
+    if USERS_RELOAD_INTERVAL > 0:
+        background.append(asyncio.create_task(reload_users_periodically(USERS_RELOAD_INTERVAL)))
+    yield
+    task.cancel()
+    for t in background:
+        t.cancel()
+    await clova_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
+
+EMBEDDING_CACHE = LRUTTLCache(
+    maxsize=EMBEDDING_CACHE_SIZE,
+    ttl=EMBEDDING_CACHE_TTL,
+    store=SQLiteStore(EMBEDDING_CACHE_DB, table="embeddings") if EMBEDDING_CACHE_DB else None,
+    # Trong bộ nhớ giữ float32 (~1/8 so với list float), SQLite vẫn lưu list JSON
+    encode=lambda emb: emb.tolist(),
+    decode=lambda emb: np.asarray(emb, dtype=np.float32),
+)
+
+async def get_embedding(text):
+    return await clova_client.embed(text)
+
+async def get_embedding_cached(text):
+    # Key = hash của đúng text gửi đi (kèm URL model) -> cùng user + câu hỏi thì không gọi API lại
+    key = hash_key(EMBEDDING_API_URL, text)
+    emb = EMBEDDING_CACHE.get(key)
+    if emb is None:
+        emb = np.asarray(await get_embedding(text), dtype=np.float32)
+        EMBEDDING_CACHE.set(key, emb)
+    return emb
+
+# Embedding profile của từng user (query /search/ không có câu hỏi), xem app/profile_embeddings.py
+PROFILE_EMBEDDINGS = make_store(PROFILE_EMBEDDING_BACKEND, PROFILE_EMBEDDING_DB)
 
 def normalize_user(raw_user: dict) -> dict:
     academic = raw_user.get("academic", {})
@@ -78,55 +125,186 @@ def normalize_user(raw_user: dict) -> dict:
     }
 
 
-def load_docs(jobname: str):
+def load_docs(jobname: str) -> RoadmapIndex:
     id_name = jobname.lower().replace(' ', '_')
-    emb_path = BASE_DIR / f'data/roadmap_embeddings/{id_name}_embeddings.csv'
-    df = pd.read_csv(emb_path)
-    df['embedding'] = df['embedding'].apply(ast.literal_eval)
-    return df
-
-def load_users():
-    users_path = BASE_DIR / 'data/users/users.json'
-    with open(users_path, 'r', encoding='utf-8') as f:
-        raw_users = json.load(f)
-    
-    users = {}
-    for ru in raw_users:
-        nu = normalize_user(ru)
-        users[nu['user_id']] = nu
-    
+    return _load_index(id_name)
+
+@lru_cache(maxsize=None)
+def _load_index(id_name: str) -> RoadmapIndex:
+    # Cache theo process: ưu tiên artifact .npy (mmap), fallback sang CSV
+    # (artifact lệch với meta, vd. build bị dừng giữa chừng -> dùng CSV, được ghi trước artifact)
+    npy_path = BASE_DIR / f'data/roadmap_embeddings/{id_name}_embeddings.npy'
+    index = None
+    if npy_path.exists():
+        try:
+            index = RoadmapIndex.from_artifact(npy_path)
+        except ValueError:
+            pass
+    if index is None:
+        emb_path = BASE_DIR / f'data/roadmap_embeddings/{id_name}_embeddings.csv'
+        index = RoadmapIndex.from_frame(pd.read_csv(emb_path))
+    return attach_vector_index(index, id_name)
+
+def attach_vector_index(index: RoadmapIndex, id_name: str) -> RoadmapIndex:
+    """
+    Gắn vector index theo VECTOR_INDEX cho index đủ lớn (IVF lưu ở <id_name>_embeddings.ivf.npz).
+    """
+    if VECTOR_INDEX != 'exact' and len(index) >= VECTOR_INDEX_MIN_DOCS:
+        ivf_path = BASE_DIR / f'data/roadmap_embeddings/{id_name}_embeddings.ivf.npz'
+        index.vector_index = make_vector_index(VECTOR_INDEX, index.matrix, path=ivf_path,
+                                               n_lists=IVF_NLIST, nprobe=IVF_NPROBE)
+    return index
+
+def list_careers() -> List[str]:
+    return sorted(p.stem for p in (BASE_DIR / 'data/jobs').glob('*.json'))
+
+@lru_cache(maxsize=1)
+def load_global_index() -> RoadmapIndex:
+    """
+    Index gộp tất cả career trong data/jobs (career nào chưa có embedding thì bỏ qua).
+    """
+    indexes = []
+    for id_name in list_careers():
+        try:
+            indexes.append(_load_index(id_name))
+        except FileNotFoundError:
+            continue
+    return attach_vector_index(RoadmapIndex.stack(indexes), 'global')
+
+def warm_up():
+    """
+    Preload index của mọi career + index gộp vào bộ nhớ (chạy một lần khi khởi động).
+    Không load được career nào -> FileNotFoundError (service chưa ready).
+    """
+    started = time.perf_counter()
+    careers = 0
+    docs = 0
+    for id_name in list_careers():
+        try:
+            index = _load_index(id_name)
+        except FileNotFoundError:
+            continue
+        # Đọc qua toàn bộ ma trận để các page của memmap nằm sẵn trong page cache
+        np.asarray(index.matrix).sum()
+        index.lexical
+        careers += 1
+        docs += len(index)
+    if careers:
+        load_global_index().lexical
+
+    READINESS.update(careers=careers, docs=docs, seconds=time.perf_counter() - started)
+    if not careers:
+        raise FileNotFoundError(
+            f"No roadmap index found in {BASE_DIR / 'data/roadmap_embeddings'} "
+            "(build with python -m app.roadmap_build)"
+        )
+
+async def run_warm_up(build_missing: bool = BUILD_INDEXES_ON_STARTUP):
+    try:
+        if build_missing:
+            await build_missing_indexes()
+        await asyncio.to_thread(warm_up)
+        READINESS["ready"] = True
+    except Exception as e:
+        READINESS["error"] = repr(e)
+        raise
+
+def load_users() -> UserStore:
+    # Profile dạng gọn (app/user_store.py), index theo user_id và target_career_id
+    users = UserStore(BASE_DIR / 'data/users/users.json', normalize_user)
+    users.reload()
     return users
 
 USERS = load_users()
 
+async def reload_users_periodically(interval: float):
+    """
+    Đọc lại users.json mỗi `interval` giây nếu file đã đổi (chỉ user đã đổi được dựng lại).
+    Profile đổi -> embedding profile tự được tính lại ở lần search sau (xem profile_version).
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(USERS.reload)
+        except (OSError, ValueError):
+            continue
+
 class SearchInput(BaseModel):
     user_id: str
     jobname: Optional[str] = None
     query: Optional[str] = None
     top_k: int = 20
+    # Filter tuỳ chọn (dùng chung cho search theo 1 career hoặc toàn bộ)
+    career_id: Optional[List[str]] = None
+    stage_id: Optional[List[str]] = None
+    area_id: Optional[List[str]] = None
+    # "dense": cosine với embedding; "lexical": chỉ BM25, không gọi API embedding;
+    # "hybrid": gộp cả hai bằng RRF (None = theo config SEARCH_MODE)
+    mode: Optional[Literal["dense", "lexical", "hybrid"]] = None
+    # Trọng số của skill gap (app/skill_gap.py) khi xếp hạng, 0 = tắt (None = theo config)
+    skill_gap_weight: Optional[float] = None
 
 class SearchResult(BaseModel):
     id: str
     content: str
     career_id: str
+    # Điểm retrieval (cosine / BM25 / RRF tuỳ mode; có skill gap thì là điểm đã trộn)
+    score: Optional[float] = None
 
 class SearchOutput(BaseModel):
     results: List[SearchResult]
 
+class SearchQuery(BaseModel):
+    # Một search trong /search/batch (các field như SearchInput, không có user_id)
+    jobname: Optional[str] = None
+    query: Optional[str] = None
+    top_k: int = 20
+    career_id: Optional[List[str]] = None
+    stage_id: Optional[List[str]] = None
+    area_id: Optional[List[str]] = None
+    mode: Optional[Literal["dense", "lexical", "hybrid"]] = None
+    skill_gap_weight: Optional[float] = None
+
+class SearchBatchInput(BaseModel):
+    user_id: str
+    searches: List[SearchQuery]
+
+class SearchBatchOutput(BaseModel):
+    # Cùng thứ tự với searches
+    results: List[SearchOutput]
+
 class RerankInput(BaseModel):
     user_id: str
     jobname: Optional[str] = None
     query: str
     top_k: int = 10   
+    mode: Optional[Literal["dense", "lexical", "hybrid"]] = None
+    # "clova" | "local" | "auto" (local nếu điểm retrieval đã tách biệt rõ, None = theo config RERANKER)
+    # local (kể cả khi auto chọn local) không sinh "answer", response trả answer = ""
+    reranker: Optional[Literal["clova", "local", "auto"]] = None
 
 
 class RerankOutput(BaseModel):
     answer: str             
     documents: List[dict]    
     reranker_raw: dict      
+    # Reranker đã dùng: "clova" | "local" | "" (không rerank)
+    reranker: str = ""
 
 
 def build_personalized_query(user: dict, question: Optional[str]) -> str:
+    return with_question(build_profile_text(user), question)
+
+def build_profile_text(user: dict) -> str:
+    """
+    Phần hồ sơ của query embedding (không phụ thuộc câu hỏi, dựng một lần cho nhiều search).
+    UserProfile của USERS giữ lại text đã render.
+    """
+    if isinstance(user, UserProfile):
+        return user.profile_text(render_profile_text)
+    return render_profile_text(user)
+
+def render_profile_text(user: dict) -> str:
     it_skills = ", ".join(user.get("it_skills", []))
     soft_skills = ", ".join(user.get("soft_skills", []))
 
@@ -149,7 +327,7 @@ def build_personalized_query(user: dict, question: Optional[str]) -> str:
     interests = ", ".join(user.get("interests", []))
     projects = "\n".join(f"- {p}" for p in user.get("projects", []))
 
-    base = (
+    return (
         f"Hồ sơ sinh viên:\n"
         f"- user_id: {user.get('user_id')}\n"
         f"- Họ tên: {user.get('full_name')}\n"
@@ -167,6 +345,7 @@ def build_personalized_query(user: dict, question: Optional[str]) -> str:
         f"- Điểm các môn (thang 10):\n{scores_str}\n"
     )
 
+def with_question(base: str, question: Optional[str]) -> str:
     if question:
         return base + f"Câu hỏi: {question}"
     else:
@@ -176,47 +355,251 @@ def build_personalized_query(user: dict, question: Optional[str]) -> str:
             "và không vượt quá thời gian học {time_per_week_hours}h/tuần nếu có thể."
         )
 
-def retrieve_docs(user: dict, question: Optional[str], top_k: int, jobname: str):
-    query = build_personalized_query(user, question)
-    q_emb = np.array(get_embedding(query))
-
-    df = load_docs(jobname)
-    
-    df['similarity'] = df['embedding'].apply(lambda emb: cosine_similarity(q_emb, np.array(emb)))
-    top_df = df.sort_values('similarity', ascending=False).head(top_k)
+def build_lexical_query(user: dict, question: Optional[str]) -> str:
+    """
+    Query cho BM25: câu hỏi nếu có, không thì các skill / sở thích trong profile.
+    """
+    if question:
+        return question
+    keywords = list(user.get("it_skills", []))
+    keywords += list(user.get("skills_technical", {}).keys())
+    keywords += list(user.get("interests", []))
+    return " ".join(str(k).replace("_", " ") for k in keywords)
+
+def profile_version(user: dict, text: str) -> str:
+    # Đổi khi meta.updated_at hoặc nội dung profile (text gửi embedding) thay đổi
+    return hash_key(EMBEDDING_API_URL, (user.get("meta") or {}).get("updated_at", ""), text)
+
+async def profile_embedding(user: dict, base: Optional[str] = None) -> np.ndarray:
+    """
+    Embedding của query không có câu hỏi (hồ sơ + mục tiêu), lấy từ PROFILE_EMBEDDINGS
+    nếu profile chưa đổi. base: build_profile_text(user) đã dựng sẵn.
+    """
+    text = with_question(base if base is not None else build_profile_text(user), None)
+    user_id = user.get("user_id")
+    version = profile_version(user, text)
+    if user_id:
+        emb = PROFILE_EMBEDDINGS.get(user_id, version)
+        if emb is not None:
+            return emb
+    emb = np.asarray(await get_embedding_cached(text), dtype=np.float32)
+    if user_id:
+        PROFILE_EMBEDDINGS.set(user_id, version, emb)
+    return emb
+
+def combine_query_embedding(profile_emb, question_emb, weight: float = SEARCH_QUESTION_WEIGHT) -> np.ndarray:
+    # Trộn hai vector đã normalize: (1 - weight) * profile + weight * câu hỏi
+    return (1.0 - weight) * normalize_vector(profile_emb) + weight * normalize_vector(question_emb)
+
+async def query_embedding(user: dict, question: Optional[str], base: Optional[str] = None) -> np.ndarray:
+    """
+    Query embedding cho search:
+    - không có câu hỏi: vector profile đã lưu (không gọi API nếu profile chưa đổi)
+    - có câu hỏi, SEARCH_QUERY_EMBEDDING="combined": vector profile + embedding chỉ của câu hỏi
+    - có câu hỏi, "full": embed hồ sơ + câu hỏi (như trước)
+    """
+    if not question:
+        return await profile_embedding(user, base)
+    if SEARCH_QUERY_EMBEDDING == 'combined':
+        profile_emb, question_emb = await asyncio.gather(
+            profile_embedding(user, base), get_embedding_cached(question)
+        )
+        return combine_query_embedding(profile_emb, question_emb)
+    base = base if base is not None else build_profile_text(user)
+    return np.asarray(await get_embedding_cached(with_question(base, question)), dtype=np.float32)
+
+async def refresh_profile_embeddings(users: dict, progress: bool = False) -> dict:
+    """
+    Tính embedding profile cho các user (user_id -> profile) chưa có trong PROFILE_EMBEDDINGS
+    hoặc đã đổi. Các call đi qua clova_client (giới hạn concurrency / rate limit chung).
+    """
+    stats = {"computed": 0, "fresh": 0, "failed": 0, "errors": []}
+    stale = []
+    for user_id, user in users.items():
+        user_id = user.get("user_id") or user_id
+        text = with_question(build_profile_text(user), None)
+        version = profile_version(user, text)
+        if PROFILE_EMBEDDINGS.get(user_id, version) is None:
+            stale.append((user_id, text, version))
+        else:
+            stats["fresh"] += 1
+
+    bar = None
+    if progress and stale:
+        from tqdm import tqdm
+
+        bar = tqdm(total=len(stale), desc="Embedding profiles", unit="users")
+
+    async def refresh(user_id, text, version):
+        try:
+            PROFILE_EMBEDDINGS.set(user_id, version, await get_embedding_cached(text))
+        except Exception as e:
+            stats["failed"] += 1
+            stats["errors"].append({"user_id": user_id, "error": repr(e)})
+        else:
+            stats["computed"] += 1
+        if bar is not None:
+            bar.update(1)
+
+    try:
+        await asyncio.gather(*(refresh(*entry) for entry in stale))
+    finally:
+        if bar is not None:
+            bar.close()
+    return stats
+
+GLOBAL_JOBNAME = '*'
+
+async def retrieve_docs(user: dict, question: Optional[str], top_k: int, jobname: str,
+                  filters: Optional[dict] = None, mode: Optional[str] = None,
+                  skill_gap_weight: Optional[float] = None):
+    """
+    jobname = '*' -> search trên index gộp của mọi career.
+    filters: {'career_ids': [...], 'stage_ids': [...], 'area_ids': [...]}
+    mode: 'dense' | 'lexical' | 'hybrid' (None = SEARCH_MODE). 'hybrid' chỉ gộp BM25
+    khi có câu hỏi; gọi API embedding lỗi hoặc index khác số chiều với query embedding
+    (artifact build bằng model khác) thì tự chuyển sang 'lexical'.
+    Search dense đi qua index.vector_index nếu có (VECTOR_INDEX=ivf).
+    skill_gap_weight > 0: xếp hạng lại theo skill gap của user (xem apply_skill_gap).
+    """
+    mode = mode or SEARCH_MODE
+    index = load_search_index(jobname)
+
+    q_emb = None
+    if mode != 'lexical':
+        try:
+            q_emb = await query_embedding(user, question)
+        except httpx.HTTPError:
+            mode = 'lexical'
+    if q_emb is not None and not index.accepts(q_emb):
+        q_emb, mode = None, 'lexical'
+
+    return rank_docs(index, user, question, top_k, filters, mode, q_emb, skill_gap_weight=skill_gap_weight)
+
+def load_search_index(jobname: str) -> RoadmapIndex:
+    return load_global_index() if jobname == GLOBAL_JOBNAME else load_docs(jobname)
+
+# Có skill gap: lấy top_k * SKILL_GAP_CANDIDATES doc theo retrieval rồi mới xếp hạng lại
+SKILL_GAP_CANDIDATES = 3
+
+def rank_docs(index: RoadmapIndex, user: dict, question: Optional[str], top_k: int,
+              filters: Optional[dict], mode: str, q_emb=None, dense_scores=None,
+              skill_gap_weight: Optional[float] = None) -> List["SearchResult"]:
+    """
+    Xếp hạng doc của index cho một search (q_emb = None khi mode = 'lexical').
+    dense_scores: cosine đã tính sẵn cho mọi doc (xem retrieve_docs_batch).
+    """
+    weight = SEARCH_SKILL_GAP_WEIGHT if skill_gap_weight is None else skill_gap_weight
+    final_k = top_k
+    if weight > 0:
+        top_k *= SKILL_GAP_CANDIDATES
+
+    mask = index.mask(**filters) if filters else None
+    if mode == 'lexical':
+        top_idx, top_scores = index.search_lexical(build_lexical_query(user, question), top_k, mask=mask)
+    elif mode == 'hybrid' and question:
+        top_idx, top_scores = index.search_hybrid(q_emb, question, top_k, mask=mask, rrf_k=SEARCH_RRF_K,
+                                                  scores=dense_scores)
+    else:
+        top_idx, top_scores = index.search(q_emb, top_k, mask=mask, scores=dense_scores)
 
     results = []
 
-    for _, row in top_df.iterrows():
+    for i, score in zip(top_idx, top_scores):
         results.append(SearchResult(
-            id=row['doc_id'],
-            content=row['text'],
-            career_id=row['career_id']
+            id=index.doc_ids[i],
+            content=index.texts[i],
+            career_id=index.career_ids[i],
+            score=float(score),
         ))
-    
-    return results
 
-def call_reranker(documents, query: str):
-    if not NCP_API_KEY:
-        raise RuntimeError("NCP_API_KEY is not set in environment variables.")
-    
-    headers = {
-        'Authorization': f'Bearer {str(NCP_API_KEY)}',
-        'Content-Type': 'application/json; charset=utf-8',
-        'X-NCP-CLOVASTUDIO-REQUEST-ID': '16b838f6e947430298b7e2563948b402'
-    }
-
-    payload = {
-        'documents': documents,
-        'query': query,
-        'maxTokens': 1024,
-    }
-
-    r = requests.post(RERANKER_API_URL, headers=headers, json=payload, timeout=60)
+    if weight > 0:
+        results = apply_skill_gap(user, results, weight)
+    return results[:final_k]
+
+def apply_skill_gap(user: dict, results: List["SearchResult"], weight: float) -> List["SearchResult"]:
+    """
+    Xếp hạng lại: (1 - weight) * điểm retrieval (min-max trong tập kết quả)
+    + weight * priority của item với user (gap * readiness, app/skill_gap.py).
+    Doc không thuộc roadmap nào trong data/jobs có priority = 0.
+    """
+    if not results:
+        return results
+    scores = np.array([r.score or 0.0 for r in results], dtype=np.float32)
+    span = scores.max() - scores.min()
+    retrieval = (scores - scores.min()) / span if span > 0 else np.ones_like(scores)
+
+    priority = np.zeros(len(results), dtype=np.float32)
+    by_career = {}
+    for i, r in enumerate(results):
+        by_career.setdefault(r.career_id, []).append(i)
+    for career_id, rows in by_career.items():
+        model = skill_gap.model_for_career(career_id)
+        if model is None:
+            continue
+        item_priority = model.score([user])["priority"][0]
+        for i in rows:
+            j = model.index_of(results[i].id)
+            if j is not None:
+                priority[i] = item_priority[j]
+
+    final = (1.0 - weight) * retrieval + weight * priority
+    return [results[i].model_copy(update={"score": float(final[i])})
+            for i in np.argsort(-final, kind="stable")]
+
+async def retrieve_docs_batch(user: dict, searches: List[dict]) -> List[List["SearchResult"]]:
+    """
+    Nhiều search cho cùng một user (mỗi search: question, top_k, jobname, filters, mode,
+    skill_gap_weight).
+    - Phần hồ sơ của query chỉ dựng một lần; các câu hỏi khác nhau được embed song song
+      (trùng câu hỏi -> một lần gọi), lỗi embedding -> search đó chuyển sang 'lexical'.
+    - Các search cùng jobname được chấm cosine bằng một phép nhân ma trận query x doc.
+    """
+    base = build_profile_text(user)
+    modes = [s.get('mode') or SEARCH_MODE for s in searches]
+    questions = {}
+    for s, mode in zip(searches, modes):
+        if mode != 'lexical':
+            questions.setdefault(s.get('question') or None, None)
+
+    embeddings = await asyncio.gather(*(query_embedding(user, q, base) for q in questions),
+                                      return_exceptions=True)
+    for question, emb in zip(list(questions), embeddings):
+        if isinstance(emb, BaseException) and not isinstance(emb, httpx.HTTPError):
+            raise emb
+        questions[question] = None if isinstance(emb, BaseException) else emb
+
+    q_embs = []
+    for i, s in enumerate(searches):
+        q_emb = questions[s.get('question') or None] if modes[i] != 'lexical' else None
+        if q_emb is None:
+            modes[i] = 'lexical'
+        q_embs.append(q_emb)
+
+    groups = {}
+    for i, s in enumerate(searches):
+        groups.setdefault(s['jobname'], []).append(i)
+
+    results = [None] * len(searches)
+    for jobname, members in groups.items():
+        index = load_search_index(jobname)
+        for i in members:
+            if q_embs[i] is not None and not index.accepts(q_embs[i]):
+                q_embs[i], modes[i] = None, 'lexical'
+        dense = [i for i in members if q_embs[i] is not None]
+        scores = {}
+        # Index có ANN (vector_index) thì từng query search qua index đó
+        if dense and index.vector_index is None:
+            matrix = index.scores_many(np.stack([q_embs[i] for i in dense]))
+            scores = dict(zip(dense, matrix))
+        for i in members:
+            s = searches[i]
+            results[i] = rank_docs(index, user, s.get('question'), s['top_k'], s.get('filters'), modes[i],
+                                   q_embs[i], scores.get(i), skill_gap_weight=s.get('skill_gap_weight'))
+    return results
 
-    r.raise_for_status()
-    time.sleep(random.uniform(0.3, 0.7))
-    return r.json()
+async def call_reranker(documents, query: str):
+    return await get_reranker('clova').call(documents, query)
 
 @app.post('/search/', response_model=SearchOutput)
 async def search(input: SearchInput) -> SearchOutput:
@@ -224,16 +607,40 @@ async def search(input: SearchInput) -> SearchOutput:
     if not user:
         return SearchOutput(results=[])
     
-    jobname = (input.jobname or '').strip()
-
-    if not jobname:
-        return SearchOutput(results=[])
+    # Không truyền jobname (hoặc '*') -> search trên toàn bộ roadmap
+    jobname = (input.jobname or '').strip() or GLOBAL_JOBNAME
 
-    docs = retrieve_docs(user, input.query, input.top_k, jobname)
+    filters = {
+        'career_ids': input.career_id,
+        'stage_ids': input.stage_id,
+        'area_ids': input.area_id,
+    }
+    docs = await retrieve_docs(user, input.query, input.top_k, jobname, filters, input.mode,
+                               input.skill_gap_weight)
     return SearchOutput(
         results = docs
     )
 
+@app.post('/search/batch', response_model=SearchBatchOutput)
+async def search_batch(input: SearchBatchInput) -> SearchBatchOutput:
+    user = USERS.get(input.user_id)
+    if not user:
+        return SearchBatchOutput(results=[SearchOutput(results=[]) for _ in input.searches])
+
+    searches = [
+        {
+            'question': q.query,
+            'top_k': q.top_k,
+            'jobname': (q.jobname or '').strip() or GLOBAL_JOBNAME,
+            'filters': {'career_ids': q.career_id, 'stage_ids': q.stage_id, 'area_ids': q.area_id},
+            'mode': q.mode,
+            'skill_gap_weight': q.skill_gap_weight,
+        }
+        for q in input.searches
+    ]
+    docs = await retrieve_docs_batch(user, searches)
+    return SearchBatchOutput(results=[SearchOutput(results=d) for d in docs])
+
 @app.post("/search_rerank/", response_model=RerankOutput)
 async def search_rerank(input: RerankInput) -> RerankOutput:
     user = USERS.get(input.user_id)
@@ -253,23 +660,62 @@ async def search_rerank(input: RerankInput) -> RerankOutput:
             reranker_raw={},
         )
 
-    docs = retrieve_docs(user, input.query, input.top_k, jobname)
+    docs = await retrieve_docs(user, input.query, input.top_k, jobname, mode=input.mode)
 
     documents_for_rerank = [
         {
             "id": d.id,
             "doc": d.content,
+            "score": d.score,
         }
         for d in docs
     ]
 
-    rerank_resp = call_reranker(documents_for_rerank, input.query)
-
-    result_block = rerank_resp.get("result", {})
-    answer_text = result_block.get("result", "")
+    if not documents_for_rerank:
+        return RerankOutput(answer="", documents=[], reranker_raw={})
+
+    policy = input.reranker or RERANKER
+    name = policy
+    if policy == "auto":
+        # Điểm retrieval đã tách biệt rõ -> rerank local, khỏi gọi reranker remote
+        skip = should_skip_rerank([d["score"] for d in documents_for_rerank], RERANK_SKIP_GAP, RERANK_SKIP_TOP)
+        name = "local" if skip else "clova"
+
+    try:
+        result = await get_reranker(name).rerank(input.query, documents_for_rerank)
+    except httpx.HTTPError:
+        if policy != "auto":
+            raise
+        # auto: reranker remote lỗi -> dùng reranker local
+        name = "local"
+        result = await get_reranker(name).rerank(input.query, documents_for_rerank)
 
     return RerankOutput(
-        answer=answer_text,
-        documents=documents_for_rerank,
-        reranker_raw=rerank_resp,
+        answer=result["answer"],
+        documents=result["documents"],
+        reranker_raw=result["raw"],
+        reranker=name,
+    )
+
+@app.post("/users/reload")
+async def reload_users(force: bool = False):
+    """
+    Đọc lại data/users/users.json không cần restart (force=True: đọc lại kể cả khi file không đổi).
+    """
+    stats = await asyncio.to_thread(USERS.reload, force)
+    return {**stats, "careers": USERS.careers()}
+
+@app.get("/cache/stats")
+async def cache_stats():
+    return {"embedding": EMBEDDING_CACHE.stats(), "profile_embeddings": PROFILE_EMBEDDINGS.stats()}
+
+@app.get("/rate_limit/stats")
+async def rate_limit_stats():
+    return get_limiter().stats()
+
+@app.get("/ready")
+async def ready():
+    return JSONResponse(
+        status_code=200 if READINESS["ready"] else 503,
+        content={**READINESS, "users": len(USERS)},
     )
@@ -0,0 +1,251 @@
+"""
+Chấm khoảng cách kỹ năng (skill gap) của sinh viên với từng item roadmap bằng NumPy,
+không gọi model. Cùng cách suy ra mức độ như personalize_rules (tag_level / item_skill_level)
+nhưng chạy theo ma trận cho một user hoặc cả cohort trong một lần:
+
+- SkillGapModel (mỗi roadmap một model):
+  tag_matrix (n_items x n_tags): số lần tag xuất hiện trong skill_tags của item
+  prereq_matrix (n_items x n_items): item i cần item j (prerequisites)
+  hours (n_items): estimated_hours
+- profile -> vector mức độ theo tag (NaN = không có bằng chứng), rồi:
+  level     = trung bình mức độ các tag có bằng chứng của item (NaN nếu không tag nào có)
+  gap       = (MASTERED_LEVEL - level) / MASTERED_LEVEL, kẹp [0, 1]; không có bằng chứng = 1
+  readiness = trung bình (1 - gap) của các item tiên quyết (1 nếu không có)
+  hours_needed = gap * estimated_hours
+  priority  = gap * readiness (chưa vững nhưng đã đủ nền tảng để học)
+"""
+import json
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .config import JOBS_DIR
+from .personalize_rules import (
+    MASTERED_LEVEL,
+    TAG_SOURCES,
+    normalize_skill,
+    partial_skill_match,
+    profile_skill_levels,
+)
+
+# Thứ tự khớp tag <-> key của profile như tag_level: mapping SKILL_TAG_SOURCES, đúng tên,
+# một phần tên (partial_skill_match, theo từ)
+_TIER_MAPPED, _TIER_EXACT, _TIER_PARTIAL = 0, 1, 2
+_N_TIERS = 3
+
+
+def _key_tiers(tag: str, key: str) -> List[int]:
+    tiers = []
+    if key in TAG_SOURCES.get(tag, ()):
+        tiers.append(_TIER_MAPPED)
+    if key == tag:
+        tiers.append(_TIER_EXACT)
+    if len(key) >= 3 and partial_skill_match(key, tag):
+        tiers.append(_TIER_PARTIAL)
+    return tiers
+
+
+class SkillGapModel:
+    def __init__(self, roadmap: dict):
+        items = [
+            it
+            for stage in roadmap.get("stages", [])
+            for area in stage.get("areas", []) or []
+            for it in area.get("items", []) or []
+            if it.get("id")
+        ]
+        self.career_id = roadmap.get("career_id")
+        self.item_ids = [it["id"] for it in items]
+        self.item_names = [it.get("name", "") for it in items]
+        self._item_index = {item_id: i for i, item_id in enumerate(self.item_ids)}
+
+        tags = {}
+        for it in items:
+            for tag in it.get("skill_tags", []) or []:
+                tags.setdefault(normalize_skill(tag), len(tags))
+        self.tags = list(tags)
+
+        n = len(items)
+        self.tag_matrix = np.zeros((n, len(self.tags)), dtype=np.float32)
+        self.prereq_matrix = np.zeros((n, n), dtype=np.float32)
+        self.hours = np.zeros(n, dtype=np.float32)
+        for i, it in enumerate(items):
+            for tag in it.get("skill_tags", []) or []:
+                self.tag_matrix[i, tags[normalize_skill(tag)]] += 1
+            for pre in it.get("prerequisites", []) or []:
+                j = self._item_index.get(pre)
+                if j is not None and j != i:
+                    self.prereq_matrix[i, j] = 1
+            try:
+                self.hours[i] = float(it.get("estimated_hours") or 0)
+            except (TypeError, ValueError):
+                pass
+        self.prereq_counts = self.prereq_matrix.sum(axis=1)
+
+        # key của profile -> [(tier, tag index)], tính một lần cho mỗi key gặp được
+        self._key_cache: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.item_ids)
+
+    def index_of(self, item_id: str) -> Optional[int]:
+        return self._item_index.get(item_id)
+
+    def _matches(self, key: str) -> list:
+        matches = self._key_cache.get(key)
+        if matches is None:
+            matches = [(tier, t) for t, tag in enumerate(self.tags) for tier in _key_tiers(tag, key)]
+            with self._lock:
+                self._key_cache[key] = matches
+        return matches
+
+    def tag_levels(self, levels_list: List[dict]) -> np.ndarray:
+        """
+        Mức độ theo tag (n_users x n_tags, NaN = không có bằng chứng) từ các dict
+        profile_skill_levels. Mỗi tier lấy max bằng np.maximum.reduceat trên các cặp (tag, key),
+        tier ưu tiên cao hơn có giá trị thì dùng tier đó.
+        """
+        keys = {}
+        for levels in levels_list:
+            for key in levels:
+                keys.setdefault(key, len(keys))
+        values = np.full((len(levels_list), len(keys)), -np.inf, dtype=np.float32)
+        for u, levels in enumerate(levels_list):
+            for key, value in levels.items():
+                values[u, keys[key]] = value
+
+        pairs = [[] for _ in range(_N_TIERS)]
+        for key, k in keys.items():
+            for tier, t in self._matches(key):
+                pairs[tier].append((t, k))
+
+        result = np.full((len(levels_list), len(self.tags)), np.nan, dtype=np.float32)
+        for tier in range(_N_TIERS):
+            if not pairs[tier]:
+                continue
+            tier_pairs = np.array(sorted(pairs[tier]), dtype=np.int64)
+            tag_idx, key_idx = tier_pairs[:, 0], tier_pairs[:, 1]
+            starts = np.flatnonzero(np.r_[True, tag_idx[1:] != tag_idx[:-1]])
+            best = np.maximum.reduceat(values[:, key_idx], starts, axis=1)
+            best[np.isneginf(best)] = np.nan
+            cols = tag_idx[starts]
+            current = result[:, cols]
+            result[:, cols] = np.where(np.isnan(current), best, current)
+        return result
+
+    def score_levels(self, levels_list: List[dict]) -> dict:
+        """
+        Điểm của mọi item cho n_users profile (mỗi mảng n_users x n_items).
+        """
+        tag_levels = self.tag_levels(levels_list)
+        evidence = ~np.isnan(tag_levels)
+        counts = evidence.astype(np.float32) @ self.tag_matrix.T
+        sums = np.where(evidence, tag_levels, 0.0).astype(np.float32) @ self.tag_matrix.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            level = np.where(counts > 0, sums / counts, np.nan).astype(np.float32)
+
+        gap = np.clip((MASTERED_LEVEL - level) / MASTERED_LEVEL, 0.0, 1.0)
+        gap = np.where(np.isnan(level), 1.0, gap).astype(np.float32)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            readiness = np.where(
+                self.prereq_counts > 0,
+                ((1.0 - gap) @ self.prereq_matrix.T) / self.prereq_counts,
+                1.0,
+            ).astype(np.float32)
+        return {
+            "level": level,
+            "evidence": counts > 0,
+            "gap": gap,
+            "readiness": readiness,
+            "hours_needed": gap * self.hours,
+            "priority": gap * readiness,
+        }
+
+    def score(self, profiles: List[dict]) -> dict:
+        return self.score_levels([profile_skill_levels(p) for p in profiles])
+
+
+@lru_cache(maxsize=None)
+def load_model(id_name: str) -> SkillGapModel:
+    """
+    Model của roadmap data/jobs/<id_name>.json (cache theo process).
+    """
+    with open(JOBS_DIR / f"{id_name}.json", "r", encoding="utf-8") as f:
+        return SkillGapModel(json.load(f))
+
+
+@lru_cache(maxsize=1)
+def _career_files() -> Dict[str, str]:
+    # career_id trong file roadmap (vd. "ai_data_scientist") -> tên file (vd. "data_scientist")
+    files = {}
+    for path in sorted(JOBS_DIR.glob("*.json")):
+        with open(path, "r", encoding="utf-8") as f:
+            files[json.load(f).get("career_id") or path.stem] = path.stem
+    return files
+
+
+def model_for_career(career_id: str) -> Optional[SkillGapModel]:
+    id_name = _career_files().get(career_id)
+    return load_model(id_name) if id_name else None
+
+
+def item_rows(model: SkillGapModel, scores: dict, user: int = 0, item_ids=None) -> List[dict]:
+    """
+    Kết quả của một user dạng list dict (theo thứ tự priority giảm dần).
+    item_ids: chỉ lấy các item này (mặc định mọi item).
+    """
+    if item_ids is None:
+        idx = np.arange(len(model))
+    else:
+        idx = np.array([i for i in map(model.index_of, item_ids) if i is not None], dtype=np.int64)
+    idx = idx[np.argsort(-scores["priority"][user, idx], kind="stable")]
+    level = scores["level"][user]
+    return [
+        {
+            "item_id": model.item_ids[i],
+            "name": model.item_names[i],
+            "level": None if np.isnan(level[i]) else round(float(level[i]), 2),
+            "gap": round(float(scores["gap"][user, i]), 3),
+            "readiness": round(float(scores["readiness"][user, i]), 3),
+            "hours_needed": round(float(scores["hours_needed"][user, i]), 1),
+            "estimated_hours": float(model.hours[i]),
+            "priority": round(float(scores["priority"][user, i]), 3),
+        }
+        for i in idx
+    ]
+
+
+def top_items(model: SkillGapModel, scores: dict, top_n: int) -> List[List[str]]:
+    """
+    top_n item_id có priority cao nhất của từng user.
+    """
+    order = np.argsort(-scores["priority"], axis=1, kind="stable")[:, :max(0, top_n)]
+    return [[model.item_ids[i] for i in row] for row in order]
+
+
+def cohort_summary(model: SkillGapModel, scores: dict) -> List[dict]:
+    """
+    Thống kê theo item trên cả cohort (theo thứ tự gap trung bình giảm dần).
+    """
+    if scores["gap"].shape[0] == 0:
+        return []
+    mean_gap = scores["gap"].mean(axis=0)
+    weak_share = (scores["gap"] >= 0.5).mean(axis=0)
+    mean_readiness = scores["readiness"].mean(axis=0)
+    mean_hours = scores["hours_needed"].mean(axis=0)
+    evidence_share = scores["evidence"].mean(axis=0)
+    return [
+        {
+            "item_id": model.item_ids[i],
+            "name": model.item_names[i],
+            "mean_gap": round(float(mean_gap[i]), 3),
+            "weak_share": round(float(weak_share[i]), 3),
+            "mean_readiness": round(float(mean_readiness[i]), 3),
+            "mean_hours_needed": round(float(mean_hours[i]), 1),
+            "evidence_share": round(float(evidence_share[i]), 3),
+        }
+        for i in np.argsort(-mean_gap, kind="stable")
+    ]
@@ -0,0 +1,262 @@
+"""
+Store profile user của data/users/users.json dạng gọn:
+- UserProfile: dataclass có __slots__, tên skill / môn học / sở thích được intern qua
+  Vocabulary dùng chung và lưu thành mảng id (array), text profile cho query embedding
+  được render một lần rồi giữ lại.
+- UserStore: index theo user_id và target_career_id, reload() chỉ dựng lại user
+  có dữ liệu thay đổi (user không đổi giữ nguyên object + text đã render).
+
+UserProfile vẫn đọc được kiểu dict (get / []) như output của normalize_user,
+nên dùng chung được với code nhận profile dict (vd. profile từ MongoDB). get / [] chỉ dựng
+field được đọc từ slot, dict đầy đủ (to_dict) dựng khi cần và không được giữ lại.
+"""
+import json
+import os
+import threading
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Vocabulary:
+    """
+    Intern chuỗi (tên skill, mã / tên môn, sở thích) -> id int; mỗi chuỗi chỉ lưu một lần.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self.names = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id(self, name) -> int:
+        name = str(name)
+        idx = self._ids.get(name)
+        if idx is None:
+            with self._lock:
+                idx = self._ids.get(name)
+                if idx is None:
+                    idx = len(self.names)
+                    self.names.append(name)
+                    self._ids[name] = idx
+        return idx
+
+    def intern(self, name):
+        # Chuỗi lặp lại giữa nhiều user (career, updated_at...) -> dùng chung một object
+        return None if name is None else self.names[self.id(name)]
+
+    def ids(self, names) -> array:
+        return array("I", (self.id(n) for n in names))
+
+    def lookup(self, ids) -> List[str]:
+        return [self.names[i] for i in ids]
+
+
+@dataclass(slots=True, eq=False)
+class UserProfile:
+    user_id: str
+    full_name: Optional[str]
+    current_semester: Optional[int]
+    gpa: Optional[float]
+    target_career_id: Optional[str]
+    actual_career: Optional[str]
+    target_confidence: Optional[float]
+    time_per_week_hours: Optional[float]
+    # id trong vocab; mức độ / điểm giữ nguyên kiểu gốc (int / float) để text render không đổi
+    it_skills: array
+    soft_skills: array
+    technical_ids: array
+    technical_levels: tuple
+    general_ids: array
+    general_levels: tuple
+    course_codes: array
+    course_names: array
+    course_grades: tuple
+    interests: array
+    projects: tuple
+    updated_at: Optional[str]
+    vocab: Vocabulary
+    # Hash dữ liệu gốc (trong process), dùng để reload chỉ dựng lại user đã đổi
+    source_hash: int = 0
+    # Text profile đã render, giữ dạng UTF-8 (tiếng Việt: ~nửa bộ nhớ so với str)
+    _text: Optional[bytes] = None
+
+    @classmethod
+    def from_dict(cls, user: dict, vocab: Vocabulary, source_hash: int = 0) -> "UserProfile":
+        """
+        user: profile dạng normalize_user.
+        """
+        technical = user.get("skills_technical") or {}
+        general = user.get("skills_general") or {}
+        courses = user.get("course_scores") or []
+        return cls(
+            user_id=user.get("user_id"),
+            full_name=user.get("full_name"),
+            current_semester=user.get("current_semester"),
+            gpa=user.get("gpa"),
+            target_career_id=vocab.intern(user.get("target_career_id")),
+            actual_career=vocab.intern(user.get("actual_career")),
+            target_confidence=user.get("target_confidence"),
+            time_per_week_hours=user.get("time_per_week_hours"),
+            it_skills=vocab.ids(user.get("it_skills") or []),
+            soft_skills=vocab.ids(user.get("soft_skills") or []),
+            technical_ids=vocab.ids(technical.keys()),
+            technical_levels=tuple(technical.values()),
+            general_ids=vocab.ids(general.keys()),
+            general_levels=tuple(general.values()),
+            course_codes=vocab.ids(c.get("code") for c in courses),
+            course_names=vocab.ids(c.get("name") for c in courses),
+            course_grades=tuple(c.get("grade") for c in courses),
+            interests=vocab.ids(user.get("interests") or []),
+            projects=tuple(user.get("projects") or []),
+            updated_at=vocab.intern((user.get("meta") or {}).get("updated_at")),
+            vocab=vocab,
+            source_hash=source_hash,
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Profile dạng dict như normalize_user (meta chỉ còn updated_at).
+        """
+        return {key: view(self) for key, view in _DICT_VIEWS.items()}
+
+    def get(self, key: str, default=None):
+        view = _DICT_VIEWS.get(key)
+        return default if view is None else view(self)
+
+    def __getitem__(self, key: str):
+        view = _DICT_VIEWS.get(key)
+        if view is None:
+            raise KeyError(key)
+        return view(self)
+
+    def keys(self):
+        return _DICT_VIEWS.keys()
+
+    def profile_text(self, render: Callable[[dict], str]) -> str:
+        """
+        Text profile render bằng render(profile dict), chỉ render lần đầu.
+        """
+        if self._text is None:
+            self._text = render(self.to_dict()).encode("utf-8")
+        return self._text.decode("utf-8")
+
+
+def _names(field: str):
+    return lambda p: p.vocab.lookup(getattr(p, field))
+
+
+def _levels(ids_field: str, levels_field: str):
+    return lambda p: dict(zip(p.vocab.lookup(getattr(p, ids_field)), getattr(p, levels_field)))
+
+
+def _courses(p: UserProfile) -> list:
+    return [
+        {"code": code, "name": name, "grade": grade}
+        for code, name, grade in zip(p.vocab.lookup(p.course_codes), p.vocab.lookup(p.course_names),
+                                     p.course_grades)
+    ]
+
+
+# key của profile dict (normalize_user) -> cách đọc từ UserProfile
+_DICT_VIEWS = {
+    "user_id": lambda p: p.user_id,
+    "full_name": lambda p: p.full_name,
+    "current_semester": lambda p: p.current_semester,
+    "gpa": lambda p: p.gpa,
+    "course_scores": _courses,
+    "target_career_id": lambda p: p.target_career_id,
+    "actual_career": lambda p: p.actual_career,
+    "target_confidence": lambda p: p.target_confidence,
+    "time_per_week_hours": lambda p: p.time_per_week_hours,
+    "it_skills": _names("it_skills"),
+    "soft_skills": _names("soft_skills"),
+    "skills_technical": _levels("technical_ids", "technical_levels"),
+    "skills_general": _levels("general_ids", "general_levels"),
+    "interests": _names("interests"),
+    "projects": lambda p: list(p.projects),
+    "meta": lambda p: {"updated_at": p.updated_at} if p.updated_at is not None else {},
+}
+
+
+class UserStore:
+    """
+    User của một file JSON (list user thô), index theo user_id và target_career_id.
+    normalize: hàm chuyển user thô -> profile dict (search_api.normalize_user).
+    """
+
+    def __init__(self, path: Path, normalize: Callable[[dict], dict]):
+        self.path = Path(path)
+        self.normalize = normalize
+        self.vocab = Vocabulary()
+        self._users: Dict[str, UserProfile] = {}
+        self._by_career: Dict[str, Dict[str, UserProfile]] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __iter__(self):
+        return iter(list(self._users))
+
+    def __contains__(self, user_id) -> bool:
+        return user_id in self._users
+
+    def get(self, user_id: str, default=None) -> Optional[UserProfile]:
+        return self._users.get(user_id, default)
+
+    def __getitem__(self, user_id: str) -> UserProfile:
+        return self._users[user_id]
+
+    def items(self) -> List[Tuple[str, UserProfile]]:
+        return list(self._users.items())
+
+    def by_career(self, career_id: str) -> List[UserProfile]:
+        return list(self._by_career.get(career_id, {}).values())
+
+    def careers(self) -> Dict[str, int]:
+        return {career_id: len(users) for career_id, users in self._by_career.items()}
+
+    def reload(self, force: bool = False) -> dict:
+        """
+        Đọc lại file nếu đã đổi (theo mtime, force=True để bỏ qua kiểm tra).
+        Chỉ user mới / có dữ liệu thay đổi được dựng lại; user không còn trong file bị xoá.
+        """
+        with self._lock:
+            mtime = os.stat(self.path).st_mtime_ns
+            if not force and mtime == self._mtime:
+                return {"changed": False, "users": len(self._users), "added": 0, "updated": 0, "removed": 0}
+
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw_users = json.load(f)
+
+            # user_id trùng trong file: bản sau ghi đè bản trước (như dict cũ)
+            users = {}
+            for raw in raw_users:
+                source_hash = hash(json.dumps(raw, sort_keys=True, ensure_ascii=False))
+                user_id = raw.get("user_id")
+                current = self._users.get(user_id)
+                if current is not None and current.source_hash == source_hash:
+                    users[user_id] = current
+                else:
+                    users[user_id] = UserProfile.from_dict(self.normalize(raw), self.vocab, source_hash)
+
+            added = sum(1 for user_id in users if user_id not in self._users)
+            updated = sum(1 for user_id, profile in users.items()
+                          if user_id in self._users and self._users[user_id] is not profile)
+            removed = sum(1 for user_id in self._users if user_id not in users)
+
+            by_career = {}
+            for user_id, profile in users.items():
+                by_career.setdefault(profile.target_career_id, {})[user_id] = profile
+
+            # Thay cả hai dict một lần -> request đang đọc luôn thấy trạng thái nhất quán
+            self._users = users
+            self._by_career = by_career
+            self._mtime = mtime
+            return {"changed": True, "users": len(users), "added": added, "updated": updated,
+                    "removed": removed}
@@ -0,0 +1,170 @@
+"""
+Vector index cho ma trận embedding đã normalize (cosine = tích vô hướng):
+- ExactIndex: brute force vector hoá (kết quả chính xác).
+- IVFIndex: inverted file bằng NumPy - chia doc vào n_lists cụm (spherical k-means),
+  query chỉ chấm điểm doc trong nprobe cụm gần nhất. nprobe càng lớn recall càng cao,
+  càng chậm (nprobe = n_lists tương đương exact).
+IVF được lưu ra <name>.ivf.npz cạnh artifact embedding, kèm fingerprint của ma trận
+để tự build lại khi embedding thay đổi.
+Ma trận nhỏ (< VECTOR_INDEX_MIN_DOCS doc) luôn dùng ExactIndex: với vài trăm doc quét
+toàn bộ đã đủ nhanh, IVF chỉ làm giảm recall (đo bằng scripts/benchmark_vector_index.py).
+"""
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .config import VECTOR_INDEX_MIN_DOCS
+from .roadmap_index import normalize_rows, normalize_vector, top_k_indices
+
+
+def _dot(matrix, q: np.ndarray) -> np.ndarray:
+    if matrix.dtype != np.float32:
+        q = q.astype(matrix.dtype)
+    return np.asarray(matrix @ q, dtype=np.float32)
+
+
+class ExactIndex:
+    kind = "exact"
+
+    def __init__(self, matrix):
+        self.matrix = matrix
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def search(self, q_emb, top_k: int, mask=None):
+        scores = _dot(self.matrix, normalize_vector(q_emb))
+        if mask is None:
+            idx = top_k_indices(scores, top_k)
+        else:
+            candidates = np.flatnonzero(mask)
+            idx = candidates[top_k_indices(scores[candidates], top_k)]
+        return idx, scores[idx]
+
+
+def spherical_kmeans(matrix: np.ndarray, n_lists: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    K-means theo cosine trên các dòng đã normalize, trả về centroid đã normalize (n_lists x dim).
+    Cụm rỗng được khởi tạo lại bằng một doc ngẫu nhiên.
+    """
+    rng = np.random.default_rng(seed)
+    n = matrix.shape[0]
+    centroids = matrix[rng.choice(n, size=n_lists, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(matrix @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, matrix)
+        counts = np.bincount(assign, minlength=n_lists)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = matrix[rng.choice(n, size=int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def matrix_fingerprint(matrix) -> str:
+    matrix = np.ascontiguousarray(matrix)
+    h = hashlib.sha256(str((matrix.shape, matrix.dtype.str)).encode("utf-8"))
+    h.update(matrix.tobytes())
+    return h.hexdigest()
+
+
+class IVFIndex:
+    kind = "ivf"
+
+    def __init__(self, matrix, centroids: np.ndarray, order: np.ndarray, offsets: np.ndarray,
+                 nprobe: int = 8):
+        self.matrix = matrix
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        # order: doc index sắp theo cụm; doc của cụm l nằm ở order[offsets[l]:offsets[l + 1]]
+        self.order = np.asarray(order, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.nprobe = nprobe
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def n_lists(self) -> int:
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(cls, matrix, n_lists: int = 0, nprobe: int = 8, iters: int = 10, seed: int = 0) -> "IVFIndex":
+        """
+        n_lists <= 0: tự chọn ~sqrt(n_docs).
+        """
+        data = np.asarray(matrix, dtype=np.float32)
+        n = data.shape[0]
+        n_lists = n_lists if n_lists > 0 else int(round(np.sqrt(n)))
+        n_lists = max(1, min(n_lists, n))
+        centroids = spherical_kmeans(data, n_lists, iters=iters, seed=seed)
+        assign = np.argmax(data @ centroids.T, axis=1)
+        order = np.argsort(assign, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=n_lists))])
+        return cls(matrix, centroids, order, offsets, nprobe=nprobe)
+
+    def candidates(self, q: np.ndarray, nprobe: int) -> np.ndarray:
+        probes = top_k_indices(self.centroids @ q, min(max(1, nprobe), self.n_lists))
+        return np.concatenate([self.order[self.offsets[l]:self.offsets[l + 1]] for l in probes])
+
+    def search(self, q_emb, top_k: int, mask=None, nprobe: int | None = None):
+        q = normalize_vector(q_emb)
+        cand = self.candidates(q, nprobe or self.nprobe)
+        if mask is not None:
+            cand = cand[mask[cand]]
+            if len(cand) < top_k:
+                # Filter quá hẹp so với các cụm đã probe -> chấm điểm chính xác trên tập đã lọc
+                cand = np.flatnonzero(mask)
+        scores = _dot(self.matrix[cand], q)
+        order = top_k_indices(scores, top_k)
+        return cand[order], scores[order]
+
+    def save(self, path: Path, fingerprint: str = ""):
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets,
+                     fingerprint=np.array(fingerprint))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: Path, matrix, nprobe: int = 8, fingerprint: str | None = None):
+        """
+        Load IVF đã lưu; None nếu không có file hoặc fingerprint không khớp ma trận hiện tại.
+        """
+        path = Path(path)
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            if fingerprint is not None and str(data["fingerprint"]) != fingerprint:
+                return None
+            return cls(matrix, data["centroids"], data["order"], data["offsets"], nprobe=nprobe)
+
+
+def load_or_build_ivf(path: Path, matrix, n_lists: int = 0, nprobe: int = 8) -> IVFIndex:
+    """
+    Dùng IVF đã lưu ở path nếu còn khớp với ma trận, không thì build lại và lưu đè.
+    """
+    fingerprint = matrix_fingerprint(matrix)
+    index = IVFIndex.load(path, matrix, nprobe=nprobe, fingerprint=fingerprint)
+    if index is None or (n_lists > 0 and index.n_lists != n_lists):
+        index = IVFIndex.build(matrix, n_lists=n_lists, nprobe=nprobe)
+        index.save(path, fingerprint)
+    return index
+
+
+def make_vector_index(kind: str, matrix, path: Path | None = None, n_lists: int = 0, nprobe: int = 8,
+                      min_docs: int = VECTOR_INDEX_MIN_DOCS):
+    """
+    kind: "exact" | "ivf". IVF được lưu / load ở path (None = chỉ build trong bộ nhớ).
+    Ma trận ít hơn min_docs dòng -> ExactIndex kể cả khi kind="ivf".
+    """
+    if kind not in ("exact", "ivf"):
+        raise ValueError(f"Unknown vector index '{kind}' (expected: exact, ivf)")
+    if kind == "exact" or matrix.shape[0] < min_docs:
+        return ExactIndex(matrix)
+    if path is None:
+        return IVFIndex.build(matrix, n_lists=n_lists, nprobe=nprobe)
+    return load_or_build_ivf(path, matrix, n_lists=n_lists, nprobe=nprobe)
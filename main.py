@@ -1,15 +1,30 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import asyncio
+from app import clova_client, mongo
+from app import personalize_api
 from app.personalize_api import app as personalize_app
 
+
+# Lifespan của app con được mount không tự chạy -> warm-up và đóng HTTP client ở đây
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = asyncio.create_task(personalize_api.run_warm_up())
+    yield
+    task.cancel()
+    await clova_client.aclose()
+    mongo.close()
+
+
 # Create main FastAPI app for Vercel
-app = FastAPI(title="Naver TMW RAG API", version="1.0.0")
+app = FastAPI(title="Naver TMW RAG API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -31,6 +46,7 @@ def read_root():
         "version": "1.0.0",
         "endpoints": {
             "personalized_roadmap": "/api/roadmap/personalized",
+            "ready": "/api/ready",
             "docs": "/docs"
         }
     }
@@ -0,0 +1,92 @@
+"""
+So sánh recall@k và latency của IVF với search chính xác (brute force).
+
+    python scripts/benchmark_vector_index.py                        # index gộp data/roadmap_embeddings
+    python scripts/benchmark_vector_index.py --synthetic 100000 --dim 1024 --nlist 316
+    python scripts/benchmark_vector_index.py --nprobe 1 2 4 8 16 32 --top-k 10
+
+Query = embedding của doc có sẵn cộng nhiễu (--noise) để không trùng hẳn doc nào.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from app.roadmap_index import normalize_rows
+from app.config import VECTOR_INDEX_MIN_DOCS
+from app.vector_index import ExactIndex, IVFIndex
+
+
+def load_matrix(args) -> np.ndarray:
+    if args.synthetic:
+        # Dữ liệu có cấu trúc cụm (gần với embedding thật hơn nhiễu đều)
+        rng = np.random.default_rng(args.seed)
+        centers = rng.standard_normal((max(1, args.synthetic // 200), args.dim)).astype(np.float32)
+        labels = rng.integers(0, len(centers), size=args.synthetic)
+        points = centers[labels] + 0.5 * rng.standard_normal((args.synthetic, args.dim)).astype(np.float32)
+        return normalize_rows(points)
+
+    from app.search_api import list_careers
+    from app.roadmap_index import RoadmapIndex
+    from app.config import EMBEDDINGS_DIR
+
+    matrices = []
+    for id_name in list_careers():
+        npy_path = EMBEDDINGS_DIR / f'{id_name}_embeddings.npy'
+        if npy_path.exists():
+            matrices.append(np.asarray(RoadmapIndex.from_artifact(npy_path).matrix, dtype=np.float32))
+    if not matrices:
+        sys.exit(f"No .npy artifact in {EMBEDDINGS_DIR} (run python -m app.roadmap_build first)")
+    return np.vstack(matrices)
+
+
+def timed(fn, queries) -> tuple:
+    started = time.perf_counter()
+    results = [fn(q)[0] for q in queries]
+    return results, (time.perf_counter() - started) / len(queries) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark recall / latency của IVF so với exact search")
+    parser.add_argument("--synthetic", type=int, default=0, help="Số doc ngẫu nhiên (0 = dùng embedding thật)")
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--nlist", type=int, default=0, help="Số cụm IVF (0 = ~sqrt(n_docs))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--noise", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    matrix = load_matrix(args)
+    rng = np.random.default_rng(args.seed + 1)
+    picks = rng.integers(0, matrix.shape[0], size=args.queries)
+    queries = matrix[picks] + args.noise * rng.standard_normal((args.queries, matrix.shape[1])).astype(np.float32) \
+        / np.sqrt(matrix.shape[1])
+
+    exact = ExactIndex(matrix)
+    truth, exact_ms = timed(lambda q: exact.search(q, args.top_k), queries)
+
+    started = time.perf_counter()
+    ivf = IVFIndex.build(matrix, n_lists=args.nlist, seed=args.seed)
+    build_s = time.perf_counter() - started
+
+    print(f"{matrix.shape[0]} docs x {matrix.shape[1]} dim, {args.queries} queries, top_k={args.top_k}")
+    print(f"IVF: {ivf.n_lists} lists, build {build_s:.2f}s")
+    if matrix.shape[0] < VECTOR_INDEX_MIN_DOCS:
+        print(f"(< VECTOR_INDEX_MIN_DOCS={VECTOR_INDEX_MIN_DOCS} docs: service dùng exact cho index này)")
+    print(f"{'index':<16}{'recall@k':>10}{'ms/query':>10}")
+    print(f"{'exact':<16}{1.0:>10.3f}{exact_ms:>10.3f}")
+    for nprobe in args.nprobe:
+        if nprobe > ivf.n_lists:
+            continue
+        found, ms = timed(lambda q: ivf.search(q, args.top_k, nprobe=nprobe), queries)
+        recall = np.mean([len(np.intersect1d(f, t)) / len(t) for f, t in zip(found, truth)])
+        print(f"{f'ivf nprobe={nprobe}':<16}{recall:>10.3f}{ms:>10.3f}")
+
+
+if __name__ == '__main__':
+    main()